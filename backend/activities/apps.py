@@ -7,3 +7,7 @@ class ActivitiesConfig(AppConfig):
 
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'activities'
+
+    def ready(self) -> None:
+        """Connect signal receivers."""
+        from . import signals
@@ -0,0 +1,108 @@
+"""Response cache for activity index and name suggestions."""
+import hashlib
+import uuid
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpRequest
+
+INDEX_VERSION_KEY = 'activities:index:version'
+
+
+def get_index_version() -> str:
+    """Return current version of activity index, create one if not exist.
+
+    :return: Version token of activity index.
+    """
+    version = cache.get(INDEX_VERSION_KEY)
+    if version is None:
+        cache.add(INDEX_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(INDEX_VERSION_KEY)
+    return str(version)
+
+
+def bump_index_version() -> None:
+    """Invalidate every cached index response by replace version with a new random token.
+
+    Version is bumped right away and again after the transaction commit, so response cached
+    by a concurrent request that still read the old data is not served after the commit.
+    Random token is used instead of counter so version never go back to the one already used.
+    """
+    def bump() -> None:
+        cache.set(INDEX_VERSION_KEY, uuid.uuid4().hex, None)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def index_cache_key(request: HttpRequest) -> str:
+    """Return cache key of activity index response for given request.
+
+    Key is built from current version, host, sorted query parameters and tzoffset header.
+
+    :param request: Http request object
+    :return: Cache key.
+    """
+    params = sorted((key, sorted(values)) for key, values in request.GET.lists())
+    raw_key = f"{request.get_host()}|{params}|{request.headers.get('tzoffset', '0')}"
+    digest = hashlib.md5(raw_key.encode(), usedforsecurity=False).hexdigest()
+    return f'activities:index:{get_index_version()}:{digest}'
+
+
+def get_cached_index(key: str) -> Optional[Any]:
+    """Return cached index response data, None if caching is disabled or not cached yet.
+
+    :param key: Cache key from index_cache_key.
+    :return: Cached response data.
+    """
+    if not settings.ACTIVITY_INDEX_CACHE_TIMEOUT:
+        return None
+    return cache.get(key)
+
+
+def set_cached_index(key: str, data: Any) -> None:
+    """Cache index response data under the key it was looked up with.
+
+    Same key must be used for both lookup and store, so response built from data read before
+    a version bump is stored under the old version and never served after the bump.
+
+    :param key: Cache key from index_cache_key.
+    :param data: Response data.
+    """
+    if settings.ACTIVITY_INDEX_CACHE_TIMEOUT:
+        cache.set(key, data, settings.ACTIVITY_INDEX_CACHE_TIMEOUT)
+
+
+def suggest_cache_key(prefix: str) -> str:
+    """Return cache key of name suggestions for given prefix, case is ignored like the suggestion itself.
+
+    :param prefix: Beginning of activity name.
+    :return: Cache key.
+    """
+    digest = hashlib.md5(prefix.casefold().encode(), usedforsecurity=False).hexdigest()
+    return f'activities:suggest:{digest}'
+
+
+def get_cached_suggestions(prefix: str) -> Optional[Any]:
+    """Return cached suggestions, None if caching is disabled or not cached yet.
+
+    :param prefix: Beginning of activity name.
+    :return: Cached suggestions.
+    """
+    if not settings.ACTIVITY_SUGGEST_CACHE_TIMEOUT:
+        return None
+    return cache.get(suggest_cache_key(prefix))
+
+
+def set_cached_suggestions(prefix: str, suggestions: Any) -> None:
+    """Cache suggestions of given prefix.
+
+    Suggestions are not invalidated by writes, they can be stale for at most ACTIVITY_SUGGEST_CACHE_TIMEOUT seconds.
+
+    :param prefix: Beginning of activity name.
+    :param suggestions: List of suggestion.
+    """
+    if settings.ACTIVITY_SUGGEST_CACHE_TIMEOUT:
+        cache.set(suggest_cache_key(prefix), suggestions, settings.ACTIVITY_SUGGEST_CACHE_TIMEOUT)
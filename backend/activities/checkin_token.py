@@ -0,0 +1,72 @@
+"""Signed, time-windowed check-in tokens for QR check-in."""
+import time
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core import signing
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+CHECKIN_TOKEN_SALT = 'activities.checkin-token'
+
+
+class InvalidCheckInToken(Exception):
+    """Raised when check-in token is malformed, forged or issued for another activity."""
+
+
+class CheckInTokenExpired(InvalidCheckInToken):
+    """Raised when check-in token is past its expiry."""
+
+
+def check_in_nonce(check_in_code: str) -> str:
+    """Return nonce of the current check-in round.
+
+    Nonce is derived from check-in code, so reopening check-in (new code) rotates every token,
+    and token does not reveal the code.
+
+    :param check_in_code: Current check-in code of activity.
+    :return: Nonce string.
+    """
+    return str(salted_hmac(CHECKIN_TOKEN_SALT, check_in_code).hexdigest()[:16])
+
+
+def make_check_in_token(activity_id: int, check_in_code: str) -> tuple[str, int]:
+    """Sign a check-in token valid for ACTIVITY_CHECKIN_TOKEN_MAX_AGE seconds.
+
+    :param activity_id: Id of activity.
+    :param check_in_code: Current check-in code of activity.
+    :return: Token and its expiry as unix timestamp.
+    """
+    expires = int(time.time()) + settings.ACTIVITY_CHECKIN_TOKEN_MAX_AGE
+    payload = {'a': activity_id, 'e': expires, 'n': check_in_nonce(check_in_code)}
+    return signing.dumps(payload, salt=CHECKIN_TOKEN_SALT), expires
+
+
+def read_check_in_token(token: str, activity_id: int) -> str:
+    """Verify signature, activity and expiry of check-in token without touching the database.
+
+    :param token: Token from make_check_in_token.
+    :param activity_id: Id of activity user check-in to.
+    :raises CheckInTokenExpired: If token is expired.
+    :raises InvalidCheckInToken: If token is not valid for the activity.
+    :return: Nonce of the token, to be compared with check_in_nonce of the current code.
+    """
+    try:
+        payload: Any = signing.loads(token, salt=CHECKIN_TOKEN_SALT)
+    except signing.BadSignature:
+        raise InvalidCheckInToken('Bad signature')
+
+    if not isinstance(payload, dict) or payload.get('a') != activity_id:
+        raise InvalidCheckInToken('Token of another activity')
+    if payload.get('e', 0) < time.time():
+        raise CheckInTokenExpired('Token expired')
+    return str(payload.get('n', ''))
+
+
+def nonce_matches(nonce: str, check_in_code: Optional[str]) -> bool:
+    """Return whether token nonce belongs to the current check-in round.
+
+    :param nonce: Nonce from read_check_in_token.
+    :param check_in_code: Current check-in code of activity, None if never opened.
+    :return: True if the token was issued for the current code.
+    """
+    return bool(check_in_code) and constant_time_compare(nonce, check_in_nonce(str(check_in_code)))
@@ -0,0 +1,75 @@
+"""Streaming export of activities and attendance as NDJSON or CSV."""
+import csv
+import json
+from typing import Any, Iterator, Optional
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, QuerySet
+
+from . import models
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def activity_rows() -> QuerySet:
+    """Return every activity as dict of exported columns, ordered by id."""
+    return models.Activity.objects.order_by('id').values(
+        'id', 'name', 'owner_id', 'date', 'end_date', 'end_registration_date', 'on_site',
+        'max_people', 'minimum_reputation_score', 'is_cancelled',
+        people=F('people_count'), latitude=F('locations__latitude'), longitude=F('locations__longitude'),
+    )
+
+
+def attendance_rows(activity_id: Optional[int] = None) -> QuerySet:
+    """Return every attendance as dict of exported columns, ordered by id.
+
+    :param activity_id: Export only attendance of this activity if given.
+    """
+    attends = models.Attend.objects.order_by('id')
+    if activity_id is not None:
+        attends = attends.filter(activity_id=activity_id)
+    return attends.values(
+        'id', 'activity_id', 'user_id', 'is_host', 'checked_in', 'rep_decrease',
+        username=F('user__username'),
+    )
+
+
+def export_lines(rows: QuerySet, file_format: str) -> Iterator[str]:
+    """Encode rows one by one into lines of the given format.
+
+    Rows are fetched in chunks (with server-side cursor on PostgreSQL), so memory stays constant.
+
+    :param rows: Queryset of dict from activity_rows or attendance_rows.
+    :param file_format: Key of EXPORT_FORMATS.
+    :return: Iterator of lines, with header line first for CSV.
+    """
+    columns = list(rows.query.values_select) + list(rows.query.annotation_select)
+    encoder = DjangoJSONEncoder()
+
+    if file_format == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(columns)
+        for row in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            yield writer.writerow([_csv_value(encoder, row[column]) for column in columns])
+    else:
+        for row in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            yield encoder.encode({column: row[column] for column in columns}) + '\n'
+
+
+class _Echo:
+    """File-like object that return what is written, so csv.writer can produce lines for streaming."""
+
+    def write(self, value: str) -> str:
+        """Return the written value."""
+        return value
+
+
+def _csv_value(encoder: json.JSONEncoder, value: Any) -> Any:
+    """Format datetime and decimal the same way as NDJSON."""
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    return encoder.default(value)
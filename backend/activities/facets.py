@@ -0,0 +1,55 @@
+"""Faceted counts of filtered activities."""
+from datetime import timedelta
+from typing import Any
+
+from django.db.models import Count, DateTimeField, ExpressionWrapper, F, Q, QuerySet
+from django.db.models.functions import ExtractWeekDay
+
+from .models import HAS_FREE_SEAT
+
+FACETS = ('weekday', 'on_site', 'free_seats')
+
+
+def parse_facets(facets_param: str | None) -> list[str]:
+    """Return known facet names from comma separated facets query parameter.
+
+    :param facets_param: Value of facets query parameter.
+    :return: List of facet names in FACETS order.
+    """
+    if not facets_param:
+        return []
+    requested = {facet.strip() for facet in facets_param.split(',')}
+    return [facet for facet in FACETS if facet in requested]
+
+
+def count_facets(queryset: QuerySet, facets: list[str], usertz: timedelta) -> dict[str, dict[Any, int]]:
+    """Count activities in each value of given facets with one aggregate query.
+
+    :param queryset: Filtered activity queryset.
+    :param facets: Facet names from FACETS.
+    :param usertz: Timezone offset of user, local time = UTC time - usertz.
+    :return: Dict of facet name to dict of facet value and number of activities,
+             weekday values are 1 = Sunday to 7 = Saturday in user timezone, others are 'true' and 'false'.
+    """
+    aggregates = {}
+    if 'weekday' in facets:
+        queryset = queryset.annotate(
+            local_week_day=ExtractWeekDay(ExpressionWrapper(F('date') - usertz, output_field=DateTimeField()))
+        )
+        for day in range(1, 8):
+            aggregates[f'weekday__{day}'] = Count('pk', filter=Q(local_week_day=day))
+    if 'on_site' in facets:
+        aggregates['on_site__true'] = Count('pk', filter=Q(on_site=True))
+        aggregates['on_site__false'] = Count('pk', filter=Q(on_site=False))
+    if 'free_seats' in facets:
+        aggregates['free_seats__true'] = Count('pk', filter=HAS_FREE_SEAT)
+        aggregates['free_seats__false'] = Count('pk', filter=~HAS_FREE_SEAT)
+
+    result: dict[str, dict[Any, int]] = {facet: {} for facet in facets}
+    if not aggregates:
+        return result
+
+    for key, count in queryset.order_by().aggregate(**aggregates).items():
+        facet, value = key.split('__')
+        result[facet][int(value) if value.isdigit() else value] = count
+    return result
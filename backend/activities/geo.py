@@ -0,0 +1,144 @@
+"""Geohash and distance utilities for proximity search of activities."""
+import math
+from typing import Any
+
+from django.db.models import F, FloatField, Q, QuerySet, Value
+from django.db.models.functions import ASin, Cast, Cos, Least, Power, Radians, Sin, Sqrt
+
+GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+
+
+def geohash_encode(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    """Encode coordinate into geohash.
+
+    :param latitude: Latitude in degree.
+    :param longitude: Longitude in degree.
+    :param precision: Number of geohash character.
+    :return: Geohash string.
+    """
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    geohash: list[str] = []
+    bit, char, even = 0, 0, True
+
+    while len(geohash) < precision:
+        value, value_range = (longitude, lon_range) if even else (latitude, lat_range)
+        mid = (value_range[0] + value_range[1]) / 2
+        if value >= mid:
+            char = (char << 1) | 1
+            value_range[0] = mid
+        else:
+            char = char << 1
+            value_range[1] = mid
+
+        even = not even
+        bit += 1
+        if bit == 5:
+            geohash.append(GEOHASH_BASE32[char])
+            bit, char = 0, 0
+
+    return ''.join(geohash)
+
+
+def geohash_cell_size(precision: int) -> tuple[float, float]:
+    """Return height and width in degree of a geohash cell.
+
+    :param precision: Number of geohash character.
+    :return: Tuple of cell height (latitude) and width (longitude) in degree.
+    """
+    lon_bits = math.ceil(precision * 5 / 2)
+    lat_bits = math.floor(precision * 5 / 2)
+    return 180 / 2 ** lat_bits, 360 / 2 ** lon_bits
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float) -> tuple[float, float, float, float]:
+    """Return box that contain every point within radius of the given coordinate.
+
+    :param latitude: Latitude of center in degree.
+    :param longitude: Longitude of center in degree.
+    :param radius_km: Radius in kilometer.
+    :return: Tuple of min latitude, max latitude, min longitude and max longitude.
+    """
+    delta_lat = radius_km / KM_PER_DEGREE
+    cos_lat = math.cos(math.radians(latitude))
+    delta_lon = 180.0 if cos_lat < 1e-6 else min(180.0, radius_km / (KM_PER_DEGREE * cos_lat))
+    return (
+        max(-90.0, latitude - delta_lat), min(90.0, latitude + delta_lat),
+        longitude - delta_lon, longitude + delta_lon
+    )
+
+
+def covering_geohashes(box: tuple[float, float, float, float]) -> list[str]:
+    """Return geohash prefixes of the cells that cover the whole box.
+
+    Use the longest precision which cell is not smaller than the box, so the box overlap at most 2x2 cells.
+
+    :param box: Tuple of min latitude, max latitude, min longitude and max longitude.
+    :return: List of geohash prefixes, empty list if box is too large to be covered.
+    """
+    min_lat, max_lat, min_lon, max_lon = box
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        cell_height, cell_width = geohash_cell_size(precision)
+        if (max_lat - min_lat) <= cell_height and (max_lon - min_lon) <= cell_width:
+            corners = [(lat, _wrap_longitude(lon)) for lat in (min_lat, max_lat) for lon in (min_lon, max_lon)]
+            return sorted({geohash_encode(lat, lon, precision) for lat, lon in corners})
+    return []
+
+
+def distance_expression(latitude: float, longitude: float, prefix: str = '') -> Any:
+    """Return haversine distance in kilometer from given coordinate as database expression.
+
+    :param latitude: Latitude in degree.
+    :param longitude: Longitude in degree.
+    :param prefix: Lookup prefix to latitude and longitude field, e.g. 'locations__'.
+    :return: Expression that can be used in annotate.
+    """
+    lat = Radians(Cast(F(f'{prefix}latitude'), FloatField()))
+    lon = Radians(Cast(F(f'{prefix}longitude'), FloatField()))
+    center_lat = math.radians(latitude)
+    center_lon = math.radians(longitude)
+
+    lat_term = Power(Sin((lat - Value(center_lat)) / 2), 2)
+    lon_term = Value(math.cos(center_lat)) * Cos(lat) * Power(Sin((lon - Value(center_lon)) / 2), 2)
+    a = lat_term + lon_term
+    return Value(2 * EARTH_RADIUS_KM) * ASin(Sqrt(Least(a, Value(1.0))))
+
+
+def filter_near(queryset: QuerySet, latitude: float, longitude: float, radius_km: float) -> QuerySet:
+    """Filter on-site activities that located within radius of given coordinate.
+
+    Geohash prefix and bounding box narrow down candidates using index before exact haversine distance is checked.
+
+    :param queryset: Activity queryset.
+    :param latitude: Latitude in degree.
+    :param longitude: Longitude in degree.
+    :param radius_km: Radius in kilometer.
+    :return: Filtered queryset annotated with distance in kilometer.
+    """
+    box = bounding_box(latitude, longitude, radius_km)
+    min_lat, max_lat, min_lon, max_lon = box
+
+    queryset = queryset.filter(on_site=True, locations__latitude__range=(min_lat, max_lat))
+
+    geohash_match = Q()
+    for geohash in covering_geohashes(box):
+        geohash_match |= Q(locations__geohash__startswith=geohash)
+    queryset = queryset.filter(geohash_match)
+
+    if min_lon < -180:
+        queryset = queryset.filter(Q(locations__longitude__gte=min_lon + 360) | Q(locations__longitude__lte=max_lon))
+    elif max_lon > 180:
+        queryset = queryset.filter(Q(locations__longitude__gte=min_lon) | Q(locations__longitude__lte=max_lon - 360))
+    else:
+        queryset = queryset.filter(locations__longitude__range=(min_lon, max_lon))
+
+    return queryset.annotate(
+        distance=distance_expression(latitude, longitude, 'locations__')
+    ).filter(distance__lte=radius_km)
+
+
+def _wrap_longitude(longitude: float) -> float:
+    """Wrap longitude into range [-180, 180)."""
+    return (longitude + 180) % 360 - 180
@@ -18,6 +18,7 @@ class Action(Enum):
     KICK = "{} KICK{} {}{}"
     EDIT_HOST = "{} EDIT HOST ACCESS to{} {}{}"
     CHECKIN = "{} CHECK-IN to{} {}{}"
+    BULK_CHECKIN = "{} BULK CHECK-IN to{} {}{}"
     OPEN_CHECKIN = "{} OPEN CHECK-IN for{} {}{}"
     CLOSE_CHECKIN = "{} CLOSE CHECK-IN for{} {}{}"
     FAIL_CREATE = "{} FAIL to CREATE{} {}{}"
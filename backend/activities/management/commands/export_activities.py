@@ -0,0 +1,36 @@
+"""Management command for exporting activities or attendance as NDJSON or CSV."""
+from typing import Any
+
+from activities.export import EXPORT_FORMATS, activity_rows, attendance_rows, export_lines
+from django.core.management.base import BaseCommand, CommandParser
+
+
+class Command(BaseCommand):
+    """Write every activity or attendance to stdout or a file, row by row with constant memory."""
+
+    help = 'Export activities or attendance as NDJSON or CSV.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add dataset, --format, --activity and --output options.
+
+        :param parser: Command argument parser.
+        """
+        parser.add_argument('dataset', choices=['activities', 'attendance'], help='Data to be exported.')
+        parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='ndjson', help='Output format.')
+        parser.add_argument('--activity', type=int, help='Export only attendance of this activity.')
+        parser.add_argument('--output', help='File to write to, stdout if not given.')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Export requested dataset."""
+        if options['dataset'] == 'attendance':
+            rows = attendance_rows(options['activity'])
+        else:
+            rows = activity_rows()
+
+        lines = export_lines(rows, options['format'])
+        if options['output']:
+            with open(options['output'], 'w', newline='') as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
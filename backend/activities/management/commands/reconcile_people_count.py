@@ -0,0 +1,38 @@
+"""Management command for finding and repairing drift of activity people count."""
+from typing import Any
+
+from activities import models
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    """Compare stored people count of every activity with its actual number of Attend objects."""
+
+    help = 'Report activities which stored people count drifted from actual number of attendees, --fix to repair.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add --fix option.
+
+        :param parser: Command argument parser.
+        """
+        parser.add_argument('--fix', action='store_true', help='Overwrite drifted people count with actual count.')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Report drifted activities and repair them if --fix is given."""
+        with transaction.atomic():
+            drifted = models.Activity.drifted_people_count().select_for_update(of=('self',))
+            rows = list(drifted.values_list('id', 'people_count', 'actual_people_count'))
+
+            for act_id, stored, actual in rows:
+                self.stdout.write(f'Activity {act_id}: stored {stored}, actual {actual}')
+                if options['fix']:
+                    models.Activity.objects.filter(pk=act_id).update(people_count=actual, updated_at=timezone.now())
+
+        if not rows:
+            self.stdout.write(self.style.SUCCESS('No drift found.'))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f'Repaired {len(rows)} activities.'))
+        else:
+            self.stdout.write(self.style.WARNING(f'Found {len(rows)} drifted activities, run with --fix to repair.'))
@@ -0,0 +1,56 @@
+"""Management command for rebuilding snapshot of upcoming activities."""
+import os
+import socket
+import time
+from typing import Any
+
+from activities.logger import logger
+from activities.snapshot import run_snapshot_rebuild, snapshot_enabled
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import close_old_connections
+
+
+class Command(BaseCommand):
+    """Rebuild snapshot that activity index read from, --loop to keep rebuilding it periodically."""
+
+    help = 'Rebuild snapshot of upcoming activities used by activity index, --loop to rebuild every ACTIVITY_SNAPSHOT_MAX_AGE.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add --loop option.
+
+        :param parser: Command argument parser.
+        """
+        parser.add_argument('--loop', action='store_true', help='Rebuild every ACTIVITY_SNAPSHOT_MAX_AGE seconds.')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Rebuild snapshot unless it is disabled, keep rebuilding if --loop is given."""
+        if not snapshot_enabled():
+            self.stdout.write(self.style.WARNING('Snapshot is disabled by ACTIVITY_SNAPSHOT_MAX_AGE=0.'))
+            return
+
+        holder = f'{socket.gethostname()}:{os.getpid()}'
+        while True:
+            self.tick(holder)
+            if not options['loop']:
+                return
+            time.sleep(settings.ACTIVITY_SNAPSHOT_MAX_AGE)
+            # Long running worker should not keep using a connection the database has dropped.
+            close_old_connections()
+
+    def tick(self, holder: str) -> None:
+        """Rebuild snapshot once, a failed rebuild is logged and retried on the next tick.
+
+        :param holder: Identity of this worker.
+        """
+        try:
+            count = run_snapshot_rebuild(holder)
+        except Exception:
+            logger.exception('Activity snapshot rebuild failed')
+            self.stderr.write('Activity snapshot rebuild failed.')
+            return
+
+        if count is None:
+            self.stdout.write('Another worker is rebuilding snapshot, skipped.')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt snapshot of {count} activities.'))
@@ -0,0 +1,57 @@
+# Generated by Django 5.1.15 on 2026-10-18 08:50
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_VECTOR_SQL = """
+CREATE OR REPLACE FUNCTION activities_activity_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', coalesce(NEW.name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(NEW.detail, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER activities_activity_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, detail ON activities_activity
+    FOR EACH ROW EXECUTE FUNCTION activities_activity_search_vector_update();
+
+UPDATE activities_activity SET search_vector =
+    setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(detail, '')), 'B');
+
+CREATE INDEX activities_activity_search_vector_gin ON activities_activity USING gin (search_vector);
+"""
+
+REVERSE_SEARCH_VECTOR_SQL = """
+DROP INDEX IF EXISTS activities_activity_search_vector_gin;
+DROP TRIGGER IF EXISTS activities_activity_search_vector_trigger ON activities_activity;
+DROP FUNCTION IF EXISTS activities_activity_search_vector_update();
+"""
+
+
+def create_search_vector_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(SEARCH_VECTOR_SQL)
+
+
+def drop_search_vector_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(REVERSE_SEARCH_VECTOR_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0018_rename_location_activity_locations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activity',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_vector_trigger, drop_search_vector_trigger),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:00
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_people(apps, schema_editor):
+    Activity = apps.get_model('activities', 'Activity')
+    Attend = apps.get_model('activities', 'Attend')
+    actual = Attend.objects.filter(
+        activity=OuterRef('pk')
+    ).order_by().values('activity').annotate(count=Count('id')).values('count')
+    Activity.objects.update(people_count=Coalesce(Subquery(actual), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0019_activity_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activity',
+            name='people_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_people, migrations.RunPython.noop),
+    ]
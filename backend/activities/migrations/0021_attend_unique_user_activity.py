@@ -0,0 +1,48 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:05
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def remove_duplicate_attends(apps, schema_editor):
+    """Keep one Attend of each user and activity, the host one or else the earliest, then recount people."""
+    Activity = apps.get_model('activities', 'Activity')
+    Attend = apps.get_model('activities', 'Attend')
+    duplicates = Attend.objects.values('user_id', 'activity_id').annotate(count=Count('id')).filter(count__gt=1)
+
+    activity_ids = set()
+    for duplicate in duplicates:
+        attends = list(Attend.objects.filter(
+            user_id=duplicate['user_id'], activity_id=duplicate['activity_id']
+        ).order_by('-is_host', 'id'))
+        kept, removed = attends[0], attends[1:]
+        # Check-in recorded on a removed duplicate is not lost.
+        if not kept.checked_in and any(attend.checked_in for attend in removed):
+            kept.checked_in = True
+            kept.save(update_fields=['checked_in'])
+        Attend.objects.filter(pk__in=[attend.pk for attend in removed]).delete()
+        activity_ids.add(duplicate['activity_id'])
+
+    if activity_ids:
+        actual = Attend.objects.filter(
+            activity=OuterRef('pk')
+        ).order_by().values('activity').annotate(count=Count('id')).values('count')
+        Activity.objects.filter(pk__in=activity_ids).update(people_count=Coalesce(Subquery(actual), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0020_activity_people_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_attends, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='attend',
+            constraint=models.UniqueConstraint(fields=('user', 'activity'), name='unique_attend_user_activity'),
+        ),
+    ]
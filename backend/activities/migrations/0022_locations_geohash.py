@@ -0,0 +1,28 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:15
+
+from activities.geo import geohash_encode
+from django.db import migrations, models
+
+
+def compute_geohash(apps, schema_editor):
+    Locations = apps.get_model('activities', 'Locations')
+    locations = list(Locations.objects.only('latitude', 'longitude'))
+    for location in locations:
+        location.geohash = geohash_encode(float(location.latitude), float(location.longitude))
+    Locations.objects.bulk_update(locations, ['geohash'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0021_attend_unique_user_activity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='locations',
+            name='geohash',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=12),
+        ),
+        migrations.RunPython(compute_geohash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0022_locations_geohash'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(condition=models.Q(('is_cancelled', False)), fields=['date', 'id'], name='activity_active_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(condition=models.Q(('is_cancelled', False)), fields=['end_registration_date'], name='activity_active_end_reg_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(condition=models.Q(('is_cancelled', False)), fields=['end_date'], name='activity_active_end_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attend',
+            index=models.Index(fields=['activity', 'is_host'], name='attend_activity_host_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attend',
+            index=models.Index(fields=['user', 'is_host', 'id'], name='attend_user_host_idx'),
+        ),
+    ]
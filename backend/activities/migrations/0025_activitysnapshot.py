@@ -0,0 +1,27 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:45
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0024_activity_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivitySnapshot',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('date', models.DateTimeField()),
+                ('end_registration_date', models.DateTimeField()),
+                ('data', models.JSONField()),
+                ('refreshed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'id'], name='snapshot_date_idx'), models.Index(fields=['end_registration_date'], name='snapshot_end_reg_idx')],
+            },
+        ),
+    ]
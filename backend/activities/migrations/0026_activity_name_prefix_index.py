@@ -0,0 +1,31 @@
+# Generated by Django 5.1.15 on 2026-10-18 10:10
+
+from django.db import migrations
+
+# Match the UPPER(name::text) LIKE 'PREFIX%' generated by name__istartswith.
+NAME_PREFIX_INDEX_SQL = """
+CREATE INDEX activities_activity_name_prefix_idx
+    ON activities_activity (UPPER(name::text) text_pattern_ops)
+    WHERE NOT is_cancelled;
+"""
+
+
+def create_name_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(NAME_PREFIX_INDEX_SQL)
+
+
+def drop_name_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS activities_activity_name_prefix_idx;')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0025_activitysnapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_name_prefix_index, drop_name_prefix_index),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.15 on 2026-10-18 10:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0026_activity_name_prefix_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activity',
+            name='settled',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(condition=models.Q(('settled', False)), fields=['end_date'], name='activity_unsettled_end_idx'),
+        ),
+    ]
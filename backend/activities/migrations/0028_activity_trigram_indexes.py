@@ -0,0 +1,48 @@
+# Generated by Django 5.1.15 on 2026-10-18 14:05
+
+from django.db import migrations
+
+# Match the UPPER(column::text) LIKE '%TERM%' generated by name__icontains and detail__icontains.
+TRIGRAM_INDEX_SQL = """
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX activities_activity_name_trgm_idx
+    ON activities_activity USING gin (UPPER(name::text) gin_trgm_ops)
+    WHERE NOT is_cancelled;
+
+CREATE INDEX activities_activity_detail_trgm_idx
+    ON activities_activity USING gin (UPPER(detail::text) gin_trgm_ops)
+    WHERE NOT is_cancelled;
+"""
+
+REVERSE_TRIGRAM_INDEX_SQL = """
+DROP INDEX IF EXISTS activities_activity_detail_trgm_idx;
+DROP INDEX IF EXISTS activities_activity_name_trgm_idx;
+"""
+
+
+def trigram_available(schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql' and trigram_available(schema_editor):
+        schema_editor.execute(TRIGRAM_INDEX_SQL)
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(REVERSE_TRIGRAM_INDEX_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0027_activity_settled'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
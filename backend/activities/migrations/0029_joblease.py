@@ -0,0 +1,30 @@
+# Generated by Django 5.1.15 on 2026-10-18 14:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0028_activity_trigram_indexes'),
+        ('profiles', '0008_move_joblease_to_activities'),
+    ]
+
+    # Table is renamed from profiles_joblease by profiles 0008, only the model state is created here.
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='JobLease',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('name', models.CharField(max_length=64, unique=True)),
+                        ('holder', models.CharField(default='', max_length=128)),
+                        ('locked_until', models.DateTimeField(blank=True, null=True)),
+                        ('last_finished_at', models.DateTimeField(blank=True, null=True)),
+                        ('last_result', models.IntegerField(blank=True, null=True)),
+                    ],
+                ),
+            ],
+        ),
+    ]
@@ -4,11 +4,22 @@ import string
 from typing import Any, Optional
 
 from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MaxValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Q, QuerySet, Subquery
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
+from .geo import geohash_encode
+
 CHECKIN_CODE_LEN = 6
+# Condition of activity that still has a seat, activity without max_people (None or 0) is never full.
+HAS_FREE_SEAT = Q(max_people__isnull=True) | Q(max_people=0) | Q(people_count__lt=F('max_people'))
+
+
+class ActivityFull(Exception):
+    """Raised when participant is added to an activity that has no seat left."""
 
 
 def get_checkin_code() -> str:
@@ -43,6 +54,15 @@ class Locations(models.Model):
 
     latitude = models.DecimalField(max_digits=9, decimal_places=6)
     longitude = models.DecimalField(max_digits=9, decimal_places=6)
+    geohash = models.CharField(max_length=12, db_index=True, editable=False, default='')
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        """Compute geohash from coordinate before saving."""
+        self.geohash = geohash_encode(float(self.latitude), float(self.longitude))
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'geohash'}
+        super().save(*args, **kwargs)
 
 
 class Activity(models.Model):
@@ -64,16 +84,48 @@ class Activity(models.Model):
         validators=[MaxValueValidator(100)]
     )
     is_cancelled = models.BooleanField(default=False)
+    # Bumped on every change of activity, its attendees, attachments and location, used for conditional GET.
+    updated_at = models.DateTimeField(auto_now=True)
+    # Set once missed check-ins of the ended or cancelled activity are deducted, see Profile.check_missed_check_ins.
+    settled = models.BooleanField(default=False, editable=False)
+    # Number of Attend objects (host included), maintained by Attend.save, Attend.delete and remove_attendees.
+    people_count = models.PositiveIntegerField(default=0, editable=False)
+
+    # Maintained by a database trigger on PostgreSQL, stay empty on other backends.
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         """Meta Class of Activity Model."""
 
         unique_together = ['owner', 'name', 'detail', 'date', 'end_date']
+        indexes = [
+            models.Index(fields=['date', 'id'], condition=Q(is_cancelled=False), name='activity_active_date_idx'),
+            models.Index(
+                fields=['end_registration_date'], condition=Q(is_cancelled=False), name='activity_active_end_reg_idx'
+            ),
+            models.Index(fields=['end_date'], condition=Q(is_cancelled=False), name='activity_active_end_date_idx'),
+            models.Index(fields=['end_date'], condition=Q(settled=False), name='activity_unsettled_end_idx'),
+        ]
+
+    # Maintained in database by F() updates, settlement and trigger, never written back from memory.
+    DATABASE_MAINTAINED_FIELDS = frozenset({'people_count', 'settled', 'search_vector'})
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        """Save activity, saving existing one without update_fields leave out DATABASE_MAINTAINED_FIELDS.
+
+        Value of those fields in memory may be stale, writing it back would undo concurrent updates.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None and not args:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.DATABASE_MAINTAINED_FIELDS
+            ]
+        super().save(*args, **kwargs)
 
     def update_check_in_code(self) -> str:
         """Regenerate activity check-in code."""
         self.check_in_code = get_checkin_code()
-        self.save()
+        self.save(update_fields=['check_in_code', 'updated_at'])
         return self.check_in_code
 
     def __str__(self) -> Any:
@@ -102,7 +154,7 @@ class Activity(models.Model):
 
         :return: list of hosts of the activity
         """
-        return [a.user for a in self.attend_set.filter(is_host=True)]
+        return [a.user for a in self.attend_set.filter(is_host=True).select_related('user').order_by('id')]
 
     def is_hosts(self, user: User) -> bool:
         """Return boolean value which tell that are given user is host of the activity or not.
@@ -110,7 +162,8 @@ class Activity(models.Model):
         :param user: User
         :return: True if the user is host of the activity, False otherwise
         """
-        return user in self.host()
+        attend = self.attend_of(user)
+        return attend is not None and attend.is_host
 
     def participants(self) -> list[User]:
         """Find all participants user of the activity (host excluded).
@@ -119,21 +172,25 @@ class Activity(models.Model):
         """
         return [a.user for a in self.attend_set.filter(is_host=False)]
 
+    def attend_of(self, user: User) -> Optional['Attend']:
+        """Return the Attend row of given user in the activity.
+
+        :param user: User model instance
+        :return: Attend object, None if user did not join the activity.
+        """
+        attend: Optional[Attend] = self.attend_set.filter(user=user).first()
+        return attend
+
     def user_status(self, user: User) -> dict[str, bool]:
         """Return dict contain status of user in each activity.
 
         :param user: User model instance
         :return: Dict contain user status in each activity.
         """
-        if not self.is_participated(user):
-            return {
-                'is_joined': False,
-                'is_checked_in': False
-            }
-
+        attend = self.attend_of(user)
         return {
-            'is_joined': True,
-            'is_checked_in': self.is_checked_in(user)
+            'is_joined': attend is not None,
+            'is_checked_in': attend is not None and attend.checked_in
         }
 
     def is_participated(self, user: User) -> bool:
@@ -142,7 +199,7 @@ class Activity(models.Model):
         :param user: User model instance
         :return: Boolean value which tell user are participated in activity or not.
         """
-        return bool(user in [a.user for a in self.attend_set.all()])
+        return bool(self.attend_set.filter(user=user).exists())
 
     def is_checked_in(self, user: User) -> bool:
         """Return boolean value which tell that are given user are already checked-in activity or not.
@@ -182,11 +239,69 @@ class Activity(models.Model):
 
     @property
     def people(self) -> int:
-        """Count number of Attend objects for the activity (host included).
+        """Number of Attend objects for the activity (host included).
 
         :return: number of people attend the activity
         """
-        return int(self.attend_set.count())
+        return int(self.people_count)
+
+    def change_people_count(self, delta: int) -> None:
+        """Atomically add delta to stored number of people and bump updated_at, then refresh them on this instance.
+
+        :param delta: Number of people joined (positive) or left (negative).
+        """
+        Activity.objects.filter(pk=self.pk).update(people_count=F('people_count') + delta, updated_at=timezone.now())
+        self.refresh_from_db(fields=['people_count', 'updated_at'])
+
+    def reserve_seat(self) -> bool:
+        """Atomically take a seat if the activity is not full.
+
+        Capacity check and increment are done by one conditional UPDATE, concurrent reservation
+        wait for the row lock and re-evaluate the condition, so max_people can never be exceeded.
+        updated_at is bumped by the same UPDATE.
+
+        :return: True if a seat is reserved, False if the activity is full.
+        """
+        reserved = Activity.objects.filter(HAS_FREE_SEAT, pk=self.pk).update(
+            people_count=F('people_count') + 1, updated_at=timezone.now()
+        )
+        return bool(reserved)
+
+    def remove_attendees(self, attends: QuerySet) -> int:
+        """Delete given Attend objects of this activity and decrease number of people accordingly.
+
+        :param attends: Attend queryset of this activity.
+        :return: Number of deleted Attend objects.
+        """
+        # Count is decreased before deleting, so receivers of post_delete see the new number of people.
+        with transaction.atomic():
+            ids = list(attends.filter(activity=self).select_for_update().values_list('id', flat=True))
+            if ids:
+                self.change_people_count(-len(ids))
+                Attend.objects.filter(pk__in=ids).delete()
+        return len(ids)
+
+    @classmethod
+    def mark_updated(cls, **lookup: Any) -> None:
+        """Bump updated_at of activities that match the lookup without loading them.
+
+        :param lookup: Keyword arguments for filtering activities.
+        """
+        cls.objects.filter(**lookup).update(updated_at=timezone.now())
+
+    @classmethod
+    def drifted_people_count(cls) -> QuerySet:
+        """Return activities which stored number of people differ from actual number of Attend objects.
+
+        :return: Activity queryset annotated with actual_people_count.
+        """
+        actual = Attend.objects.filter(
+            activity=OuterRef('pk')
+        ).order_by().values('activity').annotate(count=Count('id')).values('count')
+
+        return cls.objects.annotate(
+            actual_people_count=Coalesce(Subquery(actual), 0)
+        ).exclude(people_count=F('actual_people_count'))
 
 
 class Attend(models.Model):
@@ -198,6 +313,41 @@ class Attend(models.Model):
     checked_in = models.BooleanField(default=False)
     rep_decrease = models.BooleanField(default=False)
 
+    class Meta:
+        """Meta class of Attend Model."""
+
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'activity'], name='unique_attend_user_activity')
+        ]
+        indexes = [
+            models.Index(fields=['activity', 'is_host'], name='attend_activity_host_idx'),
+            models.Index(fields=['user', 'is_host', 'id'], name='attend_user_host_idx'),
+        ]
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        """Save attend object, newly created one also take a seat in the activity.
+
+        Participant seat is reserved before insert in the same transaction, so a failed insert
+        (e.g. user already joined) give the seat back. Host are always added.
+
+        :raises ActivityFull: If new participant is added to the activity that is full.
+        """
+        adding = self._state.adding
+        with transaction.atomic():
+            if adding:
+                if self.is_host:
+                    self.activity.change_people_count(1)
+                elif not self.activity.reserve_seat():
+                    raise ActivityFull(f'The activity {self.activity.name} is full.')
+            super().save(*args, **kwargs)
+
+    def delete(self, *args: Any, **kwargs: Any) -> Any:
+        """Delete attend object and decrease number of people in the activity."""
+        with transaction.atomic():
+            self.activity.change_people_count(-1)
+            result = super().delete(*args, **kwargs)
+        return result
+
     def __str__(self) -> str:
         """Return activity attendance information.
 
@@ -245,3 +395,67 @@ class Attachment(models.Model):
 
     image = models.ImageField('Activity', upload_to="activities/", height_field=None, width_field=None, max_length=None)
     activity = models.ForeignKey(Activity, on_delete=models.CASCADE)
+
+
+class ActivitySnapshot(models.Model):
+    """Serialized card of an upcoming activity, read by activity index instead of building it on every request."""
+
+    # Same as id of the activity, no foreign key so snapshot can be rebuilt independently of activity deletion.
+    id = models.BigIntegerField(primary_key=True)
+    date = models.DateTimeField()
+    end_registration_date = models.DateTimeField()
+    data = models.JSONField()
+    refreshed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        """Meta class of ActivitySnapshot Model."""
+
+        indexes = [
+            models.Index(fields=['date', 'id'], name='snapshot_date_idx'),
+            models.Index(fields=['end_registration_date'], name='snapshot_end_reg_idx'),
+        ]
+
+
+class JobLease(models.Model):
+    """Lease of a periodic job, only the worker holding an unexpired lease runs the job."""
+
+    name = models.CharField(max_length=64, unique=True)
+    holder = models.CharField(max_length=128, default='')
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_finished_at = models.DateTimeField(null=True, blank=True)
+    last_result = models.IntegerField(null=True, blank=True)
+
+    @classmethod
+    def acquire(cls, name: str, holder: str, seconds: int) -> bool:
+        """Take the lease of the job if nobody holds it or the holder let it expire.
+
+        :param name: Name of the job.
+        :param holder: Identity of the worker, e.g. host and process id.
+        :param seconds: Lease duration, another worker can take over after it if the holder died.
+        :return: True if the lease is taken.
+        """
+        cls.objects.get_or_create(name=name)
+        now = timezone.now()
+        return bool(
+            cls.objects.filter(Q(locked_until__isnull=True) | Q(locked_until__lt=now), name=name).update(
+                holder=holder, locked_until=now + timezone.timedelta(seconds=seconds)
+            )
+        )
+
+    @classmethod
+    def release(cls, name: str, holder: str, result: Optional[int] = None) -> None:
+        """Give the lease back, and record the run if it finished.
+
+        :param name: Name of the job.
+        :param holder: Identity of the worker that acquired the lease.
+        :param result: Result of the run, None if it failed.
+        """
+        finished: dict[str, Any] = {'last_finished_at': timezone.now(), 'last_result': result} if result is not None else {}
+        cls.objects.filter(name=name, holder=holder).update(locked_until=None, **finished)
+
+    def __str__(self) -> str:
+        """Return job name as string representative.
+
+        :return: job name
+        """
+        return str(self.name)
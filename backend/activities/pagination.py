@@ -0,0 +1,110 @@
+"""Pagination classes for activities app."""
+import base64
+import binascii
+from datetime import datetime
+from typing import Any, Optional
+
+from django.db.models import Q, QuerySet
+from django.http import HttpRequest
+from rest_framework import exceptions, pagination, response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class DateCursorPagination(pagination.BasePagination):
+    """Keyset pagination over (date, id) which return opaque next and previous cursor.
+
+    Each page is fetched by seeking from the last seen (date, id) instead of using OFFSET,
+    and no COUNT query is made, so the cost of a page does not depend on how deep it is.
+    """
+
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    page_size = api_settings.PAGE_SIZE
+
+    def paginate_queryset(self, queryset: QuerySet, request: HttpRequest, view: Any = None) -> list[Any]:
+        """Return a page of queryset that come after (or before) the given cursor.
+
+        :param queryset: Queryset to paginate.
+        :param request: Http request object
+        :param view: APIView object
+        :return: List of object in the page.
+        """
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        cursor = self.decode_cursor(request)
+
+        self.reverse = False
+        if cursor is not None:
+            self.reverse, date, pk = cursor
+            if self.reverse:
+                queryset = queryset.filter(Q(date__lte=date) & (Q(date__lt=date) | Q(id__lt=pk)))
+            else:
+                queryset = queryset.filter(Q(date__gte=date) & (Q(date__gt=date) | Q(id__gt=pk)))
+
+        ordering = ('-date', '-id') if self.reverse else ('date', 'id')
+        results = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if self.reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        return self.page
+
+    def get_paginated_response(self, data: Any) -> response.Response:
+        """Return response that contain next and previous link along with the page.
+
+        :param data: Serialized page.
+        :return: Http response object
+        """
+        return response.Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_next_link(self) -> Optional[str]:
+        """Return link to the page after the current one."""
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self) -> Optional[str]:
+        """Return link to the page before the current one."""
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return str(replace_query_param(self.base_url, self.cursor_query_param, ''))
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, obj: Any, reverse: bool) -> str:
+        """Return url with cursor that point to the position of given object.
+
+        :param obj: Object at the edge of current page.
+        :param reverse: True if cursor is used to seek backward.
+        :return: Url with encoded cursor.
+        """
+        position = f'{int(reverse)}|{obj.date.isoformat()}|{obj.id}'
+        encoded = base64.urlsafe_b64encode(position.encode()).decode()
+        return str(replace_query_param(self.base_url, self.cursor_query_param, encoded))
+
+    def decode_cursor(self, request: HttpRequest) -> Optional[tuple[bool, datetime, int]]:
+        """Decode cursor from query parameter.
+
+        :param request: Http request object
+        :raises exceptions.NotFound: If cursor is malformed.
+        :return: None if cursor is not given, otherwise tuple of direction, date and id.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            reverse, date, pk = base64.urlsafe_b64decode(encoded.encode()).decode().split('|')
+            return reverse == '1', datetime.fromisoformat(date), int(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise exceptions.NotFound(self.invalid_cursor_message)
@@ -0,0 +1,73 @@
+"""Role of the requesting user in an activity, resolved once per request."""
+from dataclasses import dataclass
+from typing import Optional
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.http import HttpRequest
+
+from . import models
+
+ROLE_CACHE_ATTR = '_activity_roles'
+
+
+@dataclass(frozen=True)
+class ActivityRole:
+    """Membership of a user in an activity, answered from the user's single Attend row."""
+
+    is_owner: bool = False
+    attend: Optional[models.Attend] = None
+
+    @property
+    def is_member(self) -> bool:
+        """Return whether user joined the activity, either as host or participant."""
+        return self.attend is not None
+
+    @property
+    def is_host(self) -> bool:
+        """Return whether user is host of the activity."""
+        return self.attend is not None and self.attend.is_host
+
+    @property
+    def is_checked_in(self) -> bool:
+        """Return whether user already checked-in to the activity."""
+        return self.attend is not None and self.attend.checked_in
+
+    def status(self) -> dict[str, bool]:
+        """Return user status in the activity, same as Activity.user_status."""
+        return {
+            'is_joined': self.is_member,
+            'is_checked_in': self.is_checked_in
+        }
+
+
+def resolve_role(activity: models.Activity, user: User | AnonymousUser) -> ActivityRole:
+    """Fetch role of the user in the activity with a single query.
+
+    :param activity: Activity model instance
+    :param user: User, anonymous user has no role
+    :return: Role of the user
+    """
+    if not user.is_authenticated:
+        return ActivityRole()
+    return ActivityRole(
+        is_owner=activity.owner_id == user.id,
+        attend=activity.attend_of(user)
+    )
+
+
+def get_role(request: HttpRequest, activity: models.Activity) -> ActivityRole:
+    """Return role of the requesting user in the activity, memoized on the request.
+
+    Every permission class and view checking the same activity share one Attend lookup.
+
+    :param request: Http or DRF request object
+    :param activity: Activity model instance
+    :return: Role of the requesting user
+    """
+    http_request = getattr(request, '_request', request)
+    roles = http_request.__dict__.setdefault(ROLE_CACHE_ATTR, {})
+    key = (activity.pk, request.user.pk)
+    if key not in roles:
+        roles[key] = resolve_role(activity, request.user)
+    role: ActivityRole = roles[key]
+    return role
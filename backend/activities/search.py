@@ -0,0 +1,79 @@
+"""Keyword search and name suggestion of activities."""
+import re
+from typing import Any
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import Case, F, FloatField, Q, QuerySet, Value, When
+
+SEARCH_CONFIG = 'simple'
+
+
+def keyword_terms(keyword: str) -> list[str]:
+    """Split user keyword into search terms, dropping every non-word character.
+
+    :param keyword: Raw keyword from query parameter.
+    :return: List of words in keyword.
+    """
+    return re.findall(r'\w+', keyword)
+
+
+def search_activities(queryset: QuerySet, keyword: str) -> QuerySet:
+    """Filter activities which name or detail contain each keyword term, words starting with the terms rank first.
+
+    Terms are matched anywhere in the text, so a term inside a Thai phrase, which has no spaces, is still found.
+    PostgreSQL serves the match from the trigram indexes and ranks it with the trigger maintained search vector,
+    other database ranks by regex matching. Name matches are ranked before detail matches.
+
+    :param queryset: Activity queryset to filter.
+    :param keyword: Raw keyword from query parameter.
+    :return: Filtered queryset annotated with search_rank.
+    """
+    terms = keyword_terms(keyword)
+    if not terms:
+        return queryset
+
+    matched = Q()
+    for term in terms:
+        matched &= Q(name__icontains=term) | Q(detail__icontains=term)
+
+    queryset = queryset.filter(matched).annotate(search_rank=_word_prefix_rank(terms))
+    return queryset.order_by('-search_rank', *queryset.query.order_by)
+
+
+def _word_prefix_rank(terms: list[str]) -> Any:
+    """Return expression that rank activities which name or detail contain words starting with each term.
+
+    :param terms: Search terms.
+    :return: Rank expression, activities without such words have the lowest rank.
+    """
+    if connection.vendor == 'postgresql':
+        query = SearchQuery(' & '.join(f'{term}:*' for term in terms), config=SEARCH_CONFIG, search_type='raw')
+        return SearchRank(F('search_vector'), query)
+
+    name_match = Q()
+    detail_match = Q()
+    for term in terms:
+        pattern = rf'(^|\W){re.escape(term)}'
+        name_match &= Q(name__iregex=pattern)
+        detail_match &= Q(detail__iregex=pattern)
+
+    return Case(
+        When(name_match, then=Value(1.0)),
+        When(detail_match, then=Value(0.5)),
+        default=Value(0.0),
+        output_field=FloatField()
+    )
+
+
+def suggest_activities(queryset: QuerySet, prefix: str, limit: int) -> list[dict[str, Any]]:
+    """Return id and name of the soonest activities which name start with prefix, ignoring case.
+
+    PostgreSQL serves the prefix match from the partial UPPER(name) index of non-cancelled activities.
+
+    :param queryset: Activity queryset to search in.
+    :param prefix: Beginning of activity name.
+    :param limit: Maximum number of suggestions.
+    :return: List of dict with id and name.
+    """
+    return list(queryset.filter(name__istartswith=prefix).order_by('date', 'id').values('id', 'name')[:limit])
@@ -1,8 +1,11 @@
 """Custom serializer validator."""
-from rest_framework import status, exceptions, serializers, validators
+from rest_framework import status, exceptions
 from .. import models
 from ..logger import logger, Action, RequestData, data_to_log
 from django.contrib.auth.models import User
+from django.db.models import BooleanField, Count, Exists, ExpressionWrapper, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from profiles.models import Profile
 from typing import Any
 
 
@@ -29,66 +32,66 @@ class CanJoinValidator:
         """
         act: models.Activity = attrs['activity']
         user: User = attrs['user']
-        user_profile = user.profile_set.first()
 
         req_data = RequestData(req_user=user, act_id=(act.id if act else -1))
 
-        if not user_profile:
+        if not act:
+            logger.warning(data_to_log(Action.FAIL_JOIN, req_data, 'Activity not exist'))
+            message = 'Activity not exist'
+            raise ForbiddenValidationError(message)
+
+        eligibility = self.eligibility(act, user)
+
+        if eligibility['already_joined']:
+            logger.warning(data_to_log(Action.FAIL_JOIN, req_data, 'Already join'))
+            raise ForbiddenValidationError(
+                {
+                    "message": f"You've already joined the activity {act.name}."
+                },
+                code='unique'
+            )
+
+        if eligibility['reputation'] is None:
             logger.warning(data_to_log(Action.FAIL_JOIN, req_data, 'No profile'))
             message = 'User must have profile page before joining an activity'
             raise ForbiddenValidationError(message)
 
-        if not user_profile.able_to_join_more:
+        if eligibility['active_joins'] >= Profile.join_limit_for(eligibility['reputation']):
             logger.warning(data_to_log(Action.FAIL_JOIN, req_data, '#Join reach limit'))
             message = 'The number of activities you have joined has reached the limit'
             raise ForbiddenValidationError(message)
 
-        if act:
-
-            if not act.is_active():
-                logger.warning(data_to_log(Action.FAIL_JOIN, req_data, 'Not active'))
-                message = f'The activity {act.name} is not active.'
-                raise ForbiddenValidationError(message)
-
-            if act.is_full():
-                logger.warning(data_to_log(Action.FAIL_JOIN, req_data, 'Full'))
-                message = f'The activity {act.name} is full.'
-                raise ForbiddenValidationError(message)
-
-            if not act.rep_check(user):
-                logger.warning(data_to_log(Action.FAIL_JOIN, req_data, 'Rep too low'))
-                message = f'Your reputation score is too low to join {act.name}'
-                raise ForbiddenValidationError(message)
+        if not act.is_active():
+            logger.warning(data_to_log(Action.FAIL_JOIN, req_data, 'Not active'))
+            message = f'The activity {act.name} is not active.'
+            raise ForbiddenValidationError(message)
 
-        else:
+        if not eligibility['has_free_seat']:
+            logger.warning(data_to_log(Action.FAIL_JOIN, req_data, 'Full'))
+            message = f'The activity {act.name} is full.'
+            raise ForbiddenValidationError(message)
 
-            logger.warning(data_to_log(Action.FAIL_JOIN, req_data, 'Activity not exist'))
-            message = 'Activity not exist'
+        if eligibility['reputation'] < eligibility['minimum_reputation_score']:
+            logger.warning(data_to_log(Action.FAIL_JOIN, req_data, 'Rep too low'))
+            message = f'Your reputation score is too low to join {act.name}'
             raise ForbiddenValidationError(message)
 
         return None
 
+    @staticmethod
+    def eligibility(act: models.Activity, user: User) -> dict[str, Any]:
+        """Fetch everything that decide whether user can join the activity in one query.
 
-class CustomMsgUniqueTogetherValidator(validators.UniqueTogetherValidator):
-    """Custom validator class base from UniqueTogetherValidator."""
-
-    status_code = status.HTTP_403_FORBIDDEN
-
-    def __call__(self, attrs: dict[str, Any], serializer: serializers.Serializer) -> Any:
-        """Validate data such that user can't join activity that they've join.
-
-        :param attrs: Dict contain instance of each field.
-        :raises ForbiddenValidationError: If user id and activity id combination are not unique.
-        :return: None
+        :param act: Activity to join
+        :param user: User attempt to join
+        :return: Dict of user reputation (None without profile), number of active joins,
+                 whether user already joined, minimum reputation and whether there is a seat left.
         """
-        try:
-            return super().__call__(attrs, serializer)
-        except validators.ValidationError:
-            req_data = RequestData(req_user=attrs['user'], act_id=attrs['activity'].id)
-            logger.warning(data_to_log(Action.FAIL_JOIN, req_data, 'Already join'))
-            raise ForbiddenValidationError(
-                {
-                    "message": f"You've already joined the activity {attrs['activity'].name}."
-                },
-                code='unique'
-            )
+        active_joins = Profile.active_attends(user.id).order_by().values('user_id').annotate(count=Count('id'))
+        eligibility: dict[str, Any] = models.Activity.objects.filter(pk=act.pk).annotate(
+            reputation=Subquery(Profile.objects.filter(user=user).order_by('pk').values('reputation_score')[:1]),
+            active_joins=Coalesce(Subquery(active_joins.values('count')), 0),
+            already_joined=Exists(models.Attend.objects.filter(activity=OuterRef('pk'), user=user)),
+            has_free_seat=ExpressionWrapper(models.HAS_FREE_SEAT, output_field=BooleanField()),
+        ).values('reputation', 'active_joins', 'already_joined', 'minimum_reputation_score', 'has_free_seat').get()
+        return eligibility
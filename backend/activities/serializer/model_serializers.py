@@ -1,5 +1,7 @@
 """Module for serializing data before respond a request."""
-from typing import Any
+from typing import Any, Mapping, Optional
+from django.db.models import Prefetch, QuerySet
+from django.utils import timezone
 from rest_framework import serializers, exceptions
 from .. import models
 from . import custom_validator
@@ -35,12 +37,59 @@ class ActivitiesSerializer(serializers.ModelSerializer):
         fields = ('__all__')
 
     def get_fields(self) -> Any:
-        """Modify get fields to exclude check-in code."""
+        """Modify get fields to exclude internal fields and unrequested fields."""
         fields = super().get_fields()
         fields.pop("check_in_code")
+        fields.pop("search_vector")
+        fields.pop("people_count")
+        fields.pop("settled")
+        fields.pop("updated_at")
+
+        request = self.context.get('request')
+        if request is not None and request.method == 'GET':
+            fields = {
+                name: field for name, field in fields.items() if self.is_field_requested(name, request.query_params)
+            }
 
         return fields
 
+    @staticmethod
+    def is_field_requested(name: str, query_params: Optional[Mapping[str, Any]]) -> bool:
+        """Return whether field is requested by comma separated fields and omit query parameters.
+
+        :param name: Name of serializer field.
+        :param query_params: Query parameters of the request, every field is requested if None.
+        :return: False if fields is given without the field or omit is given with the field, True otherwise.
+        """
+        if not query_params:
+            return True
+
+        fields = query_params.get('fields')
+        if fields and name not in {field.strip() for field in fields.split(',')}:
+            return False
+
+        omit = query_params.get('omit')
+        return not (omit and name in {field.strip() for field in omit.split(',')})
+
+    @classmethod
+    def setup_eager_loading(cls, queryset: QuerySet, query_params: Optional[Mapping[str, Any]] = None) -> QuerySet:
+        """Load everything the requested fields need in a fixed number of queries.
+
+        :param queryset: Activity queryset
+        :param query_params: Query parameters of the request for selecting fields, every field is loaded if None.
+        :return: Queryset joined with location and prefetched hosts and images if requested.
+        """
+        queryset = queryset.defer('search_vector')
+        if cls.is_field_requested('location', query_params):
+            queryset = queryset.select_related('locations')
+        if cls.is_field_requested('host', query_params):
+            queryset = queryset.prefetch_related(
+                Prefetch('attend_set', queryset=models.Attend.objects.filter(is_host=True), to_attr='host_attends')
+            )
+        if cls.is_field_requested('images', query_params):
+            queryset = queryset.prefetch_related('attachment_set')
+        return queryset
+
     def create(self, validated_data: dict[str, Any]) -> models.Activity:
         """Override create function to prevent pre-created check-in code.
 
@@ -54,13 +103,37 @@ class ActivitiesSerializer(serializers.ModelSerializer):
         result: models.Activity = super().create(validated_data)
         return result
 
+    def update(self, instance: models.Activity, validated_data: dict[str, Any]) -> models.Activity:
+        """Override update function to write only the changed fields.
+
+        :param instance: Activity to be updated
+        :param validated_data: Data that got validated
+        :return: Updated activity
+        """
+        # Settled activity that is cancelled, un-cancelled or extended into the future is settled again.
+        reopened = instance.settled and (
+            validated_data.get('is_cancelled', instance.is_cancelled) != instance.is_cancelled
+            or validated_data.get('end_date', instance.end_date) > timezone.now()
+        )
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        update_fields = [*validated_data, 'updated_at']
+        if reopened:
+            instance.settled = False
+            update_fields.append('settled')
+        instance.save(update_fields=update_fields)
+        return instance
+
     def get_host(self, activity: models.Activity) -> list[Any]:
         """Return list of activity host.
 
         :param obj: Instance of activity model
         :return: List of activity host id
         """
-        act_host = models.Attend.objects.filter(activity=activity, is_host=True)
+        if hasattr(activity, 'host_attends'):
+            act_host = activity.host_attends
+        else:
+            act_host = models.Attend.objects.filter(activity=activity, is_host=True)
         host_ids = [attend.user_id for attend in act_host]
 
         return host_ids
@@ -71,7 +144,7 @@ class ActivitiesSerializer(serializers.ModelSerializer):
         :param obj: Activity model instance.
         :return: List of serialized images.
         """
-        act_images = models.Attachment.objects.filter(activity=activity)
+        act_images = activity.attachment_set.all()
         images = [{"id": img.id, "url": img.image.url} for img in act_images]
         return images
 
@@ -87,6 +160,23 @@ class ActivitiesSerializer(serializers.ModelSerializer):
         return {"lat": None, "lon": None}
 
 
+class ActivitySnapshotSerializer(serializers.BaseSerializer):
+    """Serialize activity snapshot from its stored activity data, with the same sparse fieldsets as activity."""
+
+    def to_representation(self, snapshot: models.ActivitySnapshot) -> dict[str, Any]:
+        """Return stored activity data without unrequested fields.
+
+        :param snapshot: ActivitySnapshot model instance.
+        :return: Serialized activity.
+        """
+        request = self.context.get('request')
+        query_params = request.query_params if request is not None else None
+        return {
+            name: value for name, value in snapshot.data.items()
+            if ActivitiesSerializer.is_field_requested(name, query_params)
+        }
+
+
 class AttendSerializer(serializers.ModelSerializer):
     """Validated data and create attend model instance from it."""
 
@@ -96,11 +186,8 @@ class AttendSerializer(serializers.ModelSerializer):
         model = models.Attend
         fields = ('__all__')
 
+        # CanJoinValidator also check that user has not joined yet, in the same query as other conditions.
         validators = [
-            custom_validator.CustomMsgUniqueTogetherValidator(
-                queryset=model.objects.all(),
-                fields=['user', 'activity']
-            ),
             custom_validator.CanJoinValidator()
         ]
 
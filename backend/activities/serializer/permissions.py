@@ -3,6 +3,7 @@ from typing import Any
 from django.http import HttpRequest
 from rest_framework import permissions, generics
 from .. import models
+from ..roles import get_role
 
 
 class OnlyHostCanEdit(permissions.BasePermission):
@@ -22,7 +23,7 @@ class OnlyHostCanEdit(permissions.BasePermission):
             return True
 
         # Edit permissions are only allowed to the host.
-        return request.user in obj.host()
+        return get_role(request, obj).is_host
 
 
 class OnlyHostCanGet(permissions.BasePermission):
@@ -42,7 +43,7 @@ class OnlyHostCanGet(permissions.BasePermission):
             return True
 
         # Edit permissions are only allowed to the host.
-        return request.user in obj.host()
+        return get_role(request, obj).is_host
 
 
 class MustBeMember(permissions.BasePermission):
@@ -59,4 +60,4 @@ class MustBeMember(permissions.BasePermission):
         :return: boolean value that signify that user has permission to perform action or not.
         """
         # Edit permissions are only allowed to activity member and host.
-        return obj.is_participated(request.user) or obj.is_hosts(request.user)
+        return get_role(request, obj).is_member
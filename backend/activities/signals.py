@@ -0,0 +1,103 @@
+"""Signal receivers of activities app."""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterable, Iterator, Optional
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import models
+from .cache import bump_index_version
+from .snapshot import refresh_activity_snapshots_on_commit
+
+# Changed activity ids inside deferred_activity_changes mapped to whether updated_at still need a bump,
+# None outside of it.
+_deferred_changes: ContextVar[Optional[dict[int, bool]]] = ContextVar('deferred_activity_changes', default=None)
+
+
+@contextmanager
+def deferred_activity_changes() -> Iterator[None]:
+    """Postpone bumping updated_at and rebuilding snapshot of changed activities until the block exits.
+
+    Each changed activity is then touched and refreshed once, however many of its rows were written.
+    Nothing is done if the block raises or marks the transaction for rollback.
+    """
+    changed: dict[int, bool] = {}
+    token = _deferred_changes.set(changed)
+    try:
+        yield
+    finally:
+        _deferred_changes.reset(token)
+    if changed and not transaction.get_rollback():
+        models.Activity.mark_updated(pk__in=[activity_id for activity_id, touch in changed.items() if touch])
+        refresh_activity_snapshots_on_commit(changed)
+
+
+def activity_changed(activity_ids: Iterable[int], touch: bool = True) -> None:
+    """Bump updated_at and rebuild snapshot of changed activities after commit, or collect them if changes are deferred.
+
+    :param activity_ids: Ids of changed activities.
+    :param touch: Whether updated_at need to be bumped, saved activity already has it bumped.
+    """
+    deferred = _deferred_changes.get()
+    if deferred is not None:
+        for activity_id in activity_ids:
+            deferred[activity_id] = deferred.get(activity_id, True) and touch
+        return
+    activity_ids = set(activity_ids)
+    if touch:
+        models.Activity.mark_updated(pk__in=activity_ids)
+    refresh_activity_snapshots_on_commit(activity_ids)
+
+
+def attends_bulk_changed(activity_ids: Iterable[int]) -> None:
+    """Do what the receivers do on Attend change for rows written by QuerySet.update, which send no signal.
+
+    :param activity_ids: Ids of activities which attendees changed.
+    """
+    bump_index_version()
+    activity_changed(activity_ids)
+
+
+@receiver([post_save, post_delete], sender=models.Activity)
+@receiver([post_save, post_delete], sender=models.Attend)
+@receiver([post_save, post_delete], sender=models.Attachment)
+@receiver([post_save, post_delete], sender=models.Locations)
+def invalidate_index_cache(sender: Any, **kwargs: Any) -> None:
+    """Invalidate cached activity index when any data shown in it changed."""
+    bump_index_version()
+
+
+@receiver([post_save, post_delete], sender=models.Attachment)
+def touch_activity(sender: Any, instance: Any, **kwargs: Any) -> None:
+    """Bump updated_at and rebuild snapshot of the activity when its attachments changed."""
+    activity_changed([instance.activity_id])
+
+
+@receiver([post_save, post_delete], sender=models.Attend)
+def touch_attended_activity(sender: Any, instance: models.Attend, created: bool = False, **kwargs: Any) -> None:
+    """Rebuild snapshot of the activity when its attendees changed.
+
+    Join and leave already bumped updated_at in the UPDATE of people_count, only other change of attendee bump it here.
+    """
+    activity_changed([instance.activity_id], touch=kwargs['signal'] is post_save and not created)
+
+
+@receiver(post_save, sender=models.Locations)
+def touch_located_activity(sender: Any, instance: models.Locations, **kwargs: Any) -> None:
+    """Bump updated_at and rebuild snapshot of the activity when its location changed."""
+    activity_changed(models.Activity.objects.filter(locations=instance).values_list('id', flat=True))
+
+
+@receiver(post_save, sender=models.Activity)
+def refresh_activity_snapshot(
+        sender: Any, instance: models.Activity, update_fields: Optional[frozenset[str]] = None, **kwargs: Any) -> None:
+    """Rebuild snapshot of the saved activity, which updated_at is bumped unless left out of update_fields."""
+    activity_changed([instance.id], touch=update_fields is not None and 'updated_at' not in update_fields)
+
+
+@receiver(post_delete, sender=models.Activity)
+def remove_activity_snapshot(sender: Any, instance: models.Activity, **kwargs: Any) -> None:
+    """Remove snapshot of the deleted activity."""
+    models.ActivitySnapshot.objects.filter(pk=instance.id).delete()
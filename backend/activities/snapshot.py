@@ -0,0 +1,149 @@
+"""Snapshot of upcoming activities for activity index."""
+import json
+from functools import partial
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from . import models
+from .serializer.model_serializers import ActivitiesSerializer
+
+SNAPSHOT_JOB = 'activity-snapshot'
+SNAPSHOT_BATCH_SIZE = 500
+
+
+def snapshot_enabled() -> bool:
+    """Return whether activity index is served from snapshot."""
+    return bool(settings.ACTIVITY_SNAPSHOT_MAX_AGE)
+
+
+def upcoming_activities() -> QuerySet:
+    """Return activities that appear on activity index without any filter."""
+    return models.Activity.objects.filter(is_cancelled=False, end_registration_date__gte=timezone.now())
+
+
+def build_snapshots(activities: QuerySet) -> list[models.ActivitySnapshot]:
+    """Serialize given activities into unsaved snapshots.
+
+    Data is stored as rendered JSON, so it is exactly what activity index would respond.
+
+    :param activities: Activity queryset.
+    :return: List of snapshot, one for each activity.
+    """
+    now = timezone.now()
+    activities = ActivitiesSerializer.setup_eager_loading(activities)
+    return [
+        models.ActivitySnapshot(
+            id=activity.id,
+            date=activity.date,
+            end_registration_date=activity.end_registration_date,
+            data=json.loads(JSONRenderer().render(ActivitiesSerializer(activity).data)),
+            refreshed_at=now
+        )
+        for activity in activities
+    ]
+
+
+def save_snapshots(snapshots: Iterable[models.ActivitySnapshot]) -> None:
+    """Insert or update given snapshots.
+
+    :param snapshots: Snapshots to be saved.
+    """
+    models.ActivitySnapshot.objects.bulk_create(
+        snapshots,
+        batch_size=SNAPSHOT_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['id'],
+        update_fields=['date', 'end_registration_date', 'data', 'refreshed_at']
+    )
+
+
+def refresh_activity_snapshots(activity_ids: Iterable[int]) -> None:
+    """Rebuild snapshot of given activities, remove it if activity is no longer upcoming.
+
+    :param activity_ids: Ids of changed activities.
+    """
+    if not snapshot_enabled():
+        return
+
+    activity_ids = set(activity_ids)
+    with transaction.atomic():
+        snapshots = build_snapshots(upcoming_activities().filter(pk__in=activity_ids))
+        save_snapshots(snapshots)
+        removed = activity_ids - {snapshot.id for snapshot in snapshots}
+        if removed:
+            models.ActivitySnapshot.objects.filter(pk__in=removed).delete()
+
+
+def refresh_activity_snapshots_on_commit(activity_ids: Iterable[int]) -> None:
+    """Rebuild snapshot of given activities once the current transaction is committed.
+
+    Serializing an activity takes several queries, which should not run while the write
+    that changed it still holds the activity row lock.
+
+    :param activity_ids: Ids of changed activities.
+    """
+    if snapshot_enabled():
+        transaction.on_commit(partial(refresh_activity_snapshots, set(activity_ids)))
+
+
+def rebuild_snapshot() -> int:
+    """Rebuild snapshot of every upcoming activity and remove the outdated ones.
+
+    Snapshot refreshed by concurrent write after the rebuild started is kept.
+
+    :return: Number of activities in snapshot.
+    """
+    started = timezone.now()
+    with transaction.atomic():
+        upcoming = upcoming_activities().order_by('id')
+        count = 0
+        last_id = 0
+        while True:
+            ids = list(upcoming.filter(id__gt=last_id).values_list('id', flat=True)[:SNAPSHOT_BATCH_SIZE])
+            if not ids:
+                break
+            save_snapshots(build_snapshots(upcoming.filter(pk__in=ids)))
+            count += len(ids)
+            last_id = ids[-1]
+        models.ActivitySnapshot.objects.filter(refreshed_at__lt=started).delete()
+    return count
+
+
+def run_snapshot_rebuild(holder: str) -> Optional[int]:
+    """Rebuild snapshot unless another worker is rebuilding it.
+
+    :param holder: Identity of the worker.
+    :return: Number of activities in snapshot, None if another worker holds the lease.
+    """
+    if not models.JobLease.acquire(SNAPSHOT_JOB, holder, settings.ACTIVITY_SNAPSHOT_MAX_AGE):
+        return None
+
+    count = None
+    try:
+        count = rebuild_snapshot()
+    finally:
+        models.JobLease.release(SNAPSHOT_JOB, holder, count)
+    return count
+
+
+def snapshot_is_fresh() -> bool:
+    """Return whether snapshot was fully rebuilt within twice ACTIVITY_SNAPSHOT_MAX_AGE seconds.
+
+    Snapshot is rebuilt by refresh_activity_snapshot command every ACTIVITY_SNAPSHOT_MAX_AGE seconds,
+    request never rebuild it, so snapshot is not served when the command stopped running.
+    """
+    rebuilt_after = timezone.now() - timezone.timedelta(seconds=2 * settings.ACTIVITY_SNAPSHOT_MAX_AGE)
+    return bool(models.JobLease.objects.filter(name=SNAPSHOT_JOB, last_finished_at__gte=rebuilt_after).exists())
+
+
+def snapshot_queryset() -> QuerySet:
+    """Return snapshot of upcoming activities ordered by date, without rebuilding it.
+
+    :return: ActivitySnapshot queryset.
+    """
+    return models.ActivitySnapshot.objects.filter(end_registration_date__gte=timezone.now()).order_by('date', 'id')
@@ -1,7 +1,10 @@
 """Test for activity model of activities app."""
+import io
+
 import django.test
+from django.core.management import call_command
 
-from ..models import Attend
+from ..models import Activity, Attend
 from .shortcuts import client_join_activity, create_activity, create_test_user
 
 
@@ -133,3 +136,70 @@ class TestAttendModel(django.test.TestCase):
 
         client_join_activity(self.client, attendee, activity4)
         self.assertEqual(Attend.active_joined_activity(attendee), [activity1, activity3, activity4, activity2])
+
+
+class TestPeopleCount(django.test.TestCase):
+    """TestCase Class for stored number of people in activity."""
+
+    def setUp(self):
+        """Create an activity with host and one attendee."""
+        _, self.activity = create_activity(host=create_test_user("host"))
+        self.attendee = create_test_user("Attend")
+        client_join_activity(self.client, self.attendee, self.activity)
+
+    def test_people_count_follow_attend(self):
+        """Stored number of people should be increased and decreased with Attend objects."""
+        self.assertEqual(self.activity.people, 2)
+
+        Attend.objects.create(user=create_test_user("Bruce"), activity=self.activity)
+        self.activity.refresh_from_db()
+        self.assertEqual(self.activity.people, 3)
+
+        self.activity.attend_set.get(user=self.attendee).delete()
+        self.activity.refresh_from_db()
+        self.assertEqual(self.activity.people, 2)
+
+        removed = self.activity.remove_attendees(self.activity.attend_set.filter(is_host=False))
+        self.assertEqual(removed, 1)
+        self.assertEqual(self.activity.people, 1)
+        self.assertFalse(Activity.drifted_people_count().exists())
+
+    def test_save_does_not_overwrite_people_count(self):
+        """Saving a stale activity instance should keep people count changed by other requests."""
+        stale = Activity.objects.get(pk=self.activity.pk)
+        Attend.objects.create(user=create_test_user("Bruce"), activity=self.activity)
+
+        stale.update_check_in_code()
+        stale.name = "renamed"
+        stale.save()
+
+        self.activity.refresh_from_db()
+        self.assertEqual(self.activity.people, 3)
+        self.assertEqual(self.activity.name, "renamed")
+        self.assertEqual(self.activity.check_in_code, stale.check_in_code)
+
+    def test_reconcile_report_drift(self):
+        """Reconcile command without --fix should report drift without repairing it."""
+        Activity.objects.filter(pk=self.activity.pk).update(people_count=10)
+
+        out = io.StringIO()
+        call_command('reconcile_people_count', stdout=out)
+
+        self.assertIn(f'Activity {self.activity.id}: stored 10, actual 2', out.getvalue())
+        self.activity.refresh_from_db()
+        self.assertEqual(self.activity.people, 10)
+
+    def test_reconcile_fix_drift(self):
+        """Reconcile command with --fix should overwrite drifted count with actual count."""
+        Activity.objects.filter(pk=self.activity.pk).update(people_count=10)
+
+        out = io.StringIO()
+        call_command('reconcile_people_count', '--fix', stdout=out)
+
+        self.assertIn('Repaired 1 activities.', out.getvalue())
+        self.activity.refresh_from_db()
+        self.assertEqual(self.activity.people, 2)
+
+        out = io.StringIO()
+        call_command('reconcile_people_count', stdout=out)
+        self.assertIn('No drift found.', out.getvalue())
@@ -1,11 +1,14 @@
 """Test module for check-in behaviour."""
 import django.test
 from django import urls
+from django.test import override_settings
 from django.utils import timezone
 from profiles.models import Profile
 
-from ..models import Attend
-from .shortcuts import client_join_activity, create_activity, create_test_user
+from ..checkin_token import make_check_in_token
+from ..models import Activity, Attend
+from .shortcuts import (client_join_activity, create_activity, create_test_user,
+                        put_request_json_data)
 
 
 class CheckinTest(django.test.TestCase):
@@ -274,3 +277,196 @@ class CheckinTest(django.test.TestCase):
         self.client.put(self.url(self.activity.id) + '?status=close')
         self.client.logout()
         self.activity.refresh_from_db()
+
+    def test_role_fetched_once_per_request(self):
+        """Every permission check should share one attend query of the requesting user."""
+        self.open()
+        self.client.force_login(self.host)
+        # session, user, activity, attend
+        with self.assertNumQueries(4):
+            res = self.client.get(self.url(self.activity.id))
+        self.assertEqual(res.status_code, 200)
+
+        self.client.force_login(self.attendee)
+        with self.assertNumQueries(4):
+            res = self.client.get(self.url(self.activity.id))
+        self.assertJSONEqual(res.content, {'message': 'User must be the host to perform this action.'})
+
+        with self.assertNumQueries(4):
+            status_res = self.client.get(urls.reverse("activities:is-joined", args=[self.activity.id]))
+        self.assertJSONEqual(status_res.content, {'is_joined': True, 'is_checked_in': False})
+
+    def test_check_in_fast_path(self):
+        """Check-in should read the code with one lookup and take one update for attend and one for reputation."""
+        self.open()
+        self.client.force_login(self.attendee)
+        data = {'check_in_code': self.activity.check_in_code}
+
+        # session, user, check-in state, savepoint, check-in, reputation, release savepoint
+        with self.assertNumQueries(7):
+            res = self.client.post(self.url(self.activity.id), data=data)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self.attendee.profile_set.first().reputation_score, 1)
+
+        res = self.client.post(self.url(self.activity.id), data=data)
+        self.assertJSONEqual(res.content, {'message': f"You've already check-in to this {self.activity.name}"})
+        self.assertEqual(self.attendee.profile_set.first().reputation_score, 1)
+
+    def test_check_in_reputation_capped(self):
+        """Reputation increase of check-in should not exceed 100."""
+        self.attendee.profile_set.update(reputation_score=100)
+        self.open()
+        self.client.force_login(self.attendee)
+        res = self.client.post(self.url(self.activity.id), data={'check_in_code': self.activity.check_in_code})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self.attendee.profile_set.first().reputation_score, 100)
+
+    def test_code_follow_open_and_close(self):
+        """Check-in should follow the state in database when host close or reopen check-in."""
+        self.open()
+        old_code = self.activity.check_in_code
+
+        self.close()
+        self.client.force_login(self.attendee)
+        res = self.client.post(self.url(self.activity.id), data={'check_in_code': old_code})
+        self.assertJSONEqual(res.content, {'message': 'Check-in are not allow at the moment'})
+
+        self.open()
+        self.client.force_login(self.attendee)
+        res = self.client.post(self.url(self.activity.id), data={'check_in_code': old_code})
+        self.assertJSONEqual(res.content, {'message': 'Check-in code invalid'})
+        res = self.client.post(self.url(self.activity.id), data={'check_in_code': self.activity.check_in_code})
+        self.assertEqual(res.status_code, 200)
+
+    def test_close_without_signal_is_seen(self):
+        """Check-in closed by a write that sends no signal (e.g. another process) should be refused right away."""
+        self.open()
+        self.client.force_login(self.attendee)
+        self.client.post(self.url(self.activity.id), data={'check_in_code': 'wrongs'})
+
+        Activity.objects.filter(pk=self.activity.pk).update(check_in_allowed=False)
+        res = self.client.post(self.url(self.activity.id), data={'check_in_code': self.activity.check_in_code})
+        self.assertJSONEqual(res.content, {'message': 'Check-in are not allow at the moment'})
+
+    def get_token(self):
+        """Return check-in token signed for host."""
+        self.client.force_login(self.host)
+        res = self.client.get(urls.reverse("activities:checkin-token", args=[self.activity.id]))
+        self.client.logout()
+        self.assertEqual(res.status_code, 200)
+        return res.json()['check_in_token']
+
+    def post_token(self, token):
+        """Check-in attendee with token."""
+        self.client.force_login(self.attendee)
+        return self.client.post(self.url(self.activity.id), data={'check_in_token': token})
+
+    def test_check_in_with_token(self):
+        """Attendee should able to check-in with token from host QR code."""
+        self.open()
+        token = self.get_token()
+        self.assertNotIn(self.activity.check_in_code, token)
+
+        res = self.post_token(token)
+        self.assertJSONEqual(res.content, {'message': f"You've successfully check-in to {self.activity.name}"})
+        self.assertTrue(self.attendee.attend_set.get(activity=self.activity).checked_in)
+
+    def test_only_host_get_token(self):
+        """Attendee should not able to get check-in token."""
+        self.open()
+        self.client.force_login(self.attendee)
+        res = self.client.get(urls.reverse("activities:checkin-token", args=[self.activity.id]))
+        self.assertJSONEqual(res.content, {'message': 'User must be the host to perform this action.'})
+
+        self.close()
+        self.client.force_login(self.host)
+        res = self.client.get(urls.reverse("activities:checkin-token", args=[self.activity.id]))
+        self.assertJSONEqual(res.content, {'message': 'Check-in are not allow at the moment'})
+
+    def test_invalid_token(self):
+        """Expired, tampered or other activity token should be rejected."""
+        self.open()
+        with override_settings(ACTIVITY_CHECKIN_TOKEN_MAX_AGE=-1):
+            expired = self.get_token()
+        self.assertJSONEqual(self.post_token(expired).content, {'message': 'Check-in QR code expired'})
+
+        token = self.get_token()
+        tampered = token[:-1] + ('a' if token[-1] != 'a' else 'b')
+        self.assertJSONEqual(self.post_token(tampered).content, {'message': 'Check-in code invalid'})
+
+        other_token, _ = make_check_in_token(self.activity.id + 1, self.activity.check_in_code)
+        self.assertJSONEqual(self.post_token(other_token).content, {'message': 'Check-in code invalid'})
+        self.assertFalse(self.attendee.attend_set.get(activity=self.activity).checked_in)
+
+    def test_token_revoked_on_close_and_rotated_on_open(self):
+        """Token should be rejected after check-in is closed, and after it is reopened."""
+        self.open()
+        token = self.get_token()
+        self.close()
+        self.assertJSONEqual(self.post_token(token).content, {'message': 'Check-in are not allow at the moment'})
+
+        self.open()
+        self.assertJSONEqual(self.post_token(token).content, {'message': 'Check-in code invalid'})
+        self.assertEqual(self.post_token(self.get_token()).status_code, 200)
+
+    def test_token_follow_code_in_database(self):
+        """Token should be revoked as soon as the code in database change, even by a write that sends no signal."""
+        self.open()
+        token = self.get_token()
+        self.post_token('wrong token')
+
+        Activity.objects.filter(pk=self.activity.pk).update(check_in_code='ZZZZZZ')
+        self.assertJSONEqual(self.post_token(token).content, {'message': 'Check-in code invalid'})
+
+    def bulk_check_in(self, user_ids):
+        """Bulk check-in given users as host."""
+        self.client.force_login(self.host)
+        return put_request_json_data(self.url(self.activity.id) + '?status=bulk', self.client, {'user_ids': user_ids})
+
+    def test_bulk_check_in(self):
+        """Host should able to check-in many attendees at once, skipping the others."""
+        attendees = [create_test_user(f'Bulk {i}') for i in range(5)]
+        for attendee in attendees:
+            client_join_activity(client=self.client, user=attendee, activity=self.activity)
+        outsider = create_test_user('Outsider')
+        self.open()
+        user_ids = [attendee.id for attendee in attendees]
+
+        with self.assertLogs('activities', level='INFO') as logs:
+            res = self.bulk_check_in([*user_ids, outsider.id, self.host.id])
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()['checked_in'], user_ids)
+        self.assertEqual(res.json()['skipped'], [outsider.id, self.host.id])
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(Attend.objects.filter(activity=self.activity, checked_in=True, is_host=False).count(), 5)
+        self.assertEqual(Profile.objects.filter(user__in=attendees, reputation_score=1).count(), 5)
+
+        # Already checked-in attendees are skipped without gaining reputation again
+        res = self.bulk_check_in([user_ids[0], self.attendee.id])
+        self.assertEqual(res.json()['checked_in'], [self.attendee.id])
+        self.assertEqual(attendees[0].profile_set.first().reputation_score, 1)
+
+    def test_bulk_check_in_query_count(self):
+        """Bulk check-in should take the same queries whatever number of attendees."""
+        attendees = [create_test_user(f'Bulk {i}') for i in range(3)]
+        for attendee in attendees:
+            client_join_activity(client=self.client, user=attendee, activity=self.activity)
+        self.open()
+        self.client.force_login(self.host)
+        user_ids = [self.attendee.id, *(attendee.id for attendee in attendees)]
+        # session, user, activity, role, savepoint, lock, check-in, reputation, release savepoint
+        with self.assertNumQueries(9):
+            res = put_request_json_data(self.url(self.activity.id) + '?status=bulk', self.client, {'user_ids': user_ids})
+        self.assertEqual(res.json()['checked_in'], user_ids)
+
+    def test_bulk_check_in_only_host(self):
+        """Attendee should not able to bulk check-in, and request must be valid."""
+        self.open()
+        self.client.force_login(self.attendee)
+        res = put_request_json_data(self.url(self.activity.id) + '?status=bulk', self.client, {'user_ids': [1]})
+        self.assertJSONEqual(res.content, {'message': 'User must be the host to perform this action.'})
+
+        self.assertEqual(self.bulk_check_in('1,2').status_code, 400)
+        self.close()
+        self.assertJSONEqual(self.bulk_check_in([self.attendee.id]).content,
+                             {'message': 'Check-in are not allow at the moment'})
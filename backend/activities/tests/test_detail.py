@@ -1,9 +1,13 @@
 """Module to test on detail page of activities app."""
 import django.test
+from activities import models
 from activities.serializer.model_serializers import ActivitiesSerializer
 from django import urls
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
-from .shortcuts import activity_to_json, create_activity
+from .shortcuts import (activity_to_json, client_join_activity,
+                        create_activity, create_test_user)
 
 
 class DetailTest(django.test.TestCase):
@@ -36,3 +40,187 @@ class DetailTest(django.test.TestCase):
         response = self.client.get(urls.reverse("activities:detail", args=[activity.id]))
         expected = activity_to_json(activity)
         self.assertJSONEqual(response.content, expected)
+
+    def test_constant_number_of_queries(self):
+        """Detail page should be serialized in fixed number of queries."""
+        _, activity = create_activity()
+        activity.locations = models.Locations.objects.create(latitude=13.84, longitude=100.57)
+        activity.save()
+        for i in range(3):
+            models.Attachment.objects.create(activity=activity, image=f"activities/{i}.jpg")
+            client_join_activity(self.client, create_test_user(f"attendee{i}"), activity)
+        self.client.logout()
+
+        with self.assertNumQueries(4):
+            response = self.client.get(urls.reverse("activities:detail", args=[activity.id]))
+
+        self.assertJSONEqual(response.content, activity_to_json(activity))
+        self.assertEqual(response.json()['people'], 4)
+
+    def test_sparse_fieldsets(self):
+        """Only requested fields should be serialized and unrequested relations should not be queried."""
+        _, activity = create_activity()
+        activity.locations = models.Locations.objects.create(latitude=13.84, longitude=100.57)
+        activity.save()
+        url = urls.reverse("activities:detail", args=[activity.id])
+
+        with self.assertNumQueries(2):
+            response = self.client.get(url + "?fields=id,name,date")
+        self.assertEqual(response.json(), {key: activity_to_json(activity)[key] for key in ('id', 'name', 'date')})
+
+        with self.assertNumQueries(2):
+            response = self.client.get(url + "?omit=host,images,location")
+        expected = activity_to_json(activity)
+        for key in ('host', 'images', 'location'):
+            expected.pop(key)
+        self.assertEqual(response.json(), expected)
+
+        with self.assertNumQueries(3):
+            response = self.client.get(url + "?fields=name,host")
+        self.assertEqual(response.json(), {"name": activity.name, "host": [activity.owner.id]})
+
+
+class ConditionalGetTest(django.test.TestCase):
+    """Test Cases for ETag and Last-Modified of activity detail."""
+
+    def setUp(self):
+        """Create an activity with location and get its ETag."""
+        _, self.activity = create_activity()
+        self.activity.locations = models.Locations.objects.create(latitude=13.84, longitude=100.57)
+        self.activity.save()
+        self.url = urls.reverse("activities:detail", args=[self.activity.id])
+        self.etag = self.client.get(self.url)['ETag']
+
+    def assert_changed(self):
+        """Assert that ETag of the activity changed and remember the new one."""
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=self.etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], self.etag)
+        self.etag = response['ETag']
+
+    def test_not_modified(self):
+        """Unchanged activity should respond with not modified after a single query."""
+        response = self.client.get(self.url)
+        self.assertEqual(response['ETag'], self.etag)
+        self.assertIn('Last-Modified', response)
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=self.etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_fields_have_different_etag(self):
+        """Different sparse fieldsets should not share ETag."""
+        response = self.client.get(self.url + "?fields=name", HTTP_IF_NONE_MATCH=self.etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], self.etag)
+
+    def test_change_update_etag(self):
+        """Edit, join, leave, attachment, location and host change should update ETag."""
+        self.activity.name = "new name"
+        self.activity.save()
+        self.assert_changed()
+
+        attendee = create_test_user("attendee")
+        client_join_activity(self.client, attendee, self.activity)
+        self.assert_changed()
+
+        attend = self.activity.attend_set.get(user=attendee)
+        attend.is_host = True
+        attend.save()
+        self.assert_changed()
+
+        attend.delete()
+        self.assert_changed()
+
+        attachment = models.Attachment.objects.create(activity=self.activity, image="activities/0.jpg")
+        self.assert_changed()
+
+        attachment.delete()
+        self.assert_changed()
+
+        location = self.activity.locations
+        location.latitude = 14
+        location.save()
+        self.assert_changed()
+
+    def test_join_and_leave_write_activity_once(self):
+        """Join and leave should bump updated_at in the UPDATE of people count, not in another one."""
+        self.client.force_login(create_test_user("attendee"))
+        url = urls.reverse("activities:join", args=[self.activity.id])
+        for method in (self.client.post, self.client.delete):
+            with CaptureQueriesContext(connection) as queries:
+                method(url)
+            updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "activities_activity"')]
+            self.assertEqual(len(updates), 1)
+            self.assertIn('"updated_at"', updates[0])
+            self.assert_changed()
+
+    def test_not_found(self):
+        """Activity that does not exist should still respond with not found."""
+        response = self.client.get(urls.reverse("activities:detail", args=[self.activity.id + 1000]))
+        self.assertEqual(response.status_code, 404)
+
+
+class BatchDetailTest(django.test.TestCase):
+    """Test Cases for fetching detail of many activities at once."""
+
+    def setUp(self):
+        """Create activities with location, attachment and attendee."""
+        self.url = urls.reverse("activities:batch")
+        self.host_user = create_test_user("Host")
+        self.activities = []
+        for i in range(3):
+            _, activity = create_activity(host=self.host_user, data={"name": f"act{i}", "detail": "hello"})
+            activity.locations = models.Locations.objects.create(latitude=13.84, longitude=100.57)
+            activity.save()
+            models.Attachment.objects.create(activity=activity, image=f"activities/{i}.jpg")
+            client_join_activity(self.client, create_test_user(f"attendee{i}"), activity)
+            activity.refresh_from_db()
+            self.activities.append(activity)
+        self.client.logout()
+
+    def get_batch(self, ids):
+        """Return response of batch request with given ids."""
+        return self.client.get(self.url + "?ids=" + ",".join(str(pk) for pk in ids))
+
+    def test_batch_detail(self):
+        """Batch should return same payload as detail page in the requested order."""
+        act0, act1, act2 = self.activities
+        response = self.get_batch([act2.id, act0.id, act1.id])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            "results": [activity_to_json(act) for act in (act2, act0, act1)],
+            "not_found": [],
+        })
+        for result in response.json()['results']:
+            detail = self.client.get(urls.reverse("activities:detail", args=[result['id']]))
+            self.assertEqual(result, detail.json())
+
+    def test_not_found_and_duplicate(self):
+        """Missing ids should be listed in not_found and duplicate ids returned once."""
+        act0 = self.activities[0]
+        missing_id = max(act.id for act in self.activities) + 1000
+        response = self.get_batch([act0.id, missing_id, act0.id])
+        self.assertEqual(response.json(), {"results": [activity_to_json(act0)], "not_found": [missing_id]})
+
+    def test_constant_number_of_queries(self):
+        """Number of queries should not grow with number of requested activities."""
+        with self.assertNumQueries(3):
+            self.get_batch([self.activities[0].id])
+        with self.assertNumQueries(3):
+            self.get_batch([act.id for act in self.activities])
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url + f"?ids={self.activities[0].id}&fields=id,name")
+        self.assertEqual(response.json()['results'], [{"id": self.activities[0].id, "name": "act0"}])
+
+    def test_invalid_ids(self):
+        """Malformed, missing or too many ids should respond with bad request."""
+        for query in ("", "?ids=", "?ids=1,a", "?ids=" + ",".join(str(i) for i in range(101))):
+            response = self.client.get(self.url + query)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("message", response.json())
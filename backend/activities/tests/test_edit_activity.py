@@ -3,9 +3,12 @@ import json
 
 import django.test
 from activities import models
-from activities.tests.constants import (CAMERA_EXPECTED, CAMERA_IMAGE,
-                                        SCHOOL_EXPECTED, SCHOOL_IMAGE)
+from activities.tests.constants import (BASE64_IMAGE, CAMERA_EXPECTED,
+                                        CAMERA_IMAGE, SCHOOL_EXPECTED,
+                                        SCHOOL_IMAGE)
 from django import urls
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from .shortcuts import (activity_to_json, client_join_activity,
                         create_activity, create_test_user,
@@ -219,3 +222,54 @@ class EditActivityTest(django.test.TestCase):
 
         self.assertTrue(self.activity.is_participated(att1))
         self.assertTrue(self.activity.is_participated(att3))
+        self.assertEqual(self.activity.people, 3)
+
+    def full_edit_data(self):
+        """Join attendees and attach an image, return data editing everything at once."""
+        attendees = [create_test_user(f"att{i}") for i in range(4)]
+        for attendee in attendees:
+            client_join_activity(self.client, attendee, self.activity)
+        self.client.force_login(self.host)
+        put_request_json_data(self.url, self.client, {"new_images": [BASE64_IMAGE]})
+        self.attachment = self.activity.attachment_set.get()
+        self.addCleanup(self.attachment.image.storage.delete, self.attachment.image.name)
+        return {
+            "name": "Updated Activity",
+            "max_people": 20,
+            "location": {"lat": 13.84, "lon": 100.57},
+            "remove_attachments": [self.attachment.id],
+            "attendee_to_remove": [attendee.id for attendee in attendees[:2]],
+        }
+
+    def test_full_edit_query_count(self):
+        """Edit of every part of an activity should load it once and run a fixed number of queries."""
+        data = self.full_edit_data()
+        with CaptureQueriesContext(connection) as ctx:
+            response = put_request_json_data(self.url, self.client, data)
+        self.assertEqual(response.status_code, 200)
+        activity_load = 'SELECT "activities_activity"."id", "activities_activity"."owner_id"'
+        loads = [query for query in ctx.captured_queries if query['sql'].startswith(activity_load)]
+        # Once by the view, instead of once by each step of the edit, snapshot row is refreshed after commit
+        self.assertEqual(len(loads), 1)
+
+        self.activity.refresh_from_db()
+        self.assertEqual(self.activity.name, data["name"])
+        self.assertEqual(float(self.activity.locations.latitude), 13.84)
+        self.assertEqual(self.activity.people, 3)
+        self.assertFalse(self.activity.attachment_set.exists())
+
+    def test_failed_edit_is_rollbacked(self):
+        """Error in the middle of an edit should leave the activity untouched."""
+        data = self.full_edit_data()
+        outsider = create_test_user("outsider")
+        data["grant_host"] = [outsider.id]
+
+        response = put_request_json_data(self.url, self.client, data)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()["message"], f"Cannot find user {outsider.username} in this activity.")
+
+        self.activity.refresh_from_db()
+        self.assertEqual(self.activity.name, "Test Activity")
+        self.assertIsNone(self.activity.locations)
+        self.assertEqual(self.activity.people, 5)
+        self.assertTrue(self.activity.attachment_set.filter(pk=self.attachment.id).exists())
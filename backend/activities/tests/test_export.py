@@ -0,0 +1,81 @@
+"""Module to test streaming export of activities and attendance."""
+import csv
+import json
+from io import StringIO
+
+import django.test
+from activities import models
+from django import urls
+from django.contrib.auth.models import User
+from django.core.management import call_command
+
+from .shortcuts import client_join_activity, create_activity, create_test_user
+
+
+class ExportTest(django.test.TestCase):
+    """Test Cases for export endpoint and command."""
+
+    def setUp(self):
+        """Create activities with attendees and a staff user."""
+        self.host_user = create_test_user("Host")
+        _, self.activity = create_activity(host=self.host_user, data={"name": "act, \"quoted\"", "detail": "hello"})
+        self.activity.locations = models.Locations.objects.create(latitude=13.84, longitude=100.57)
+        self.activity.save()
+        _, self.other_activity = create_activity(host=self.host_user, data={"name": "other", "detail": "hello"})
+        self.attendee = create_test_user("attendee")
+        client_join_activity(self.client, self.attendee, self.activity)
+        self.client.logout()
+
+        self.staff = User.objects.create_user(username="staff", password="password", is_staff=True)
+
+    def export(self, dataset, file_format, query=""):
+        """Return streamed content of export request as staff."""
+        self.client.force_login(self.staff)
+        response = self.client.get(urls.reverse("activities:export", args=[dataset, file_format]) + query)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_staff_only(self):
+        """Only staff should be able to export."""
+        url = urls.reverse("activities:export", args=["attendance", "csv"])
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.client.force_login(self.host_user)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_export_activities_ndjson(self):
+        """Every activity should be exported as one JSON object per line."""
+        lines = self.export("activities", "ndjson").splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([row['id'] for row in rows], [self.activity.id, self.other_activity.id])
+        self.assertEqual(rows[0]['name'], self.activity.name)
+        self.assertEqual(rows[0]['people'], 2)
+        self.assertEqual(rows[0]['latitude'], "13.840000")
+        self.assertIsNone(rows[1]['latitude'])
+
+    def test_export_attendance_csv(self):
+        """Attendance should be exported as CSV with header, optionally filtered by activity."""
+        rows = list(csv.DictReader(StringIO(self.export("attendance", "csv"))))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(
+            list(rows[0]),
+            ['id', 'activity_id', 'user_id', 'is_host', 'checked_in', 'rep_decrease', 'username']
+        )
+
+        rows = list(csv.DictReader(StringIO(self.export("attendance", "csv", f"?activity={self.activity.id}"))))
+        self.assertEqual([(row['username'], row['is_host']) for row in rows], [("Host", "True"), ("attendee", "False")])
+
+        self.client.force_login(self.staff)
+        url = urls.reverse("activities:export", args=["attendance", "csv"])
+        self.assertEqual(self.client.get(url + "?activity=abc").status_code, 400)
+
+    def test_export_activities_csv_quoting(self):
+        """Name with comma and quote should survive CSV round trip."""
+        rows = list(csv.DictReader(StringIO(self.export("activities", "csv"))))
+        self.assertEqual(rows[0]['name'], self.activity.name)
+
+    def test_export_command(self):
+        """Command should write the same content as the endpoint."""
+        out = StringIO()
+        call_command('export_activities', 'attendance', '--format', 'csv', stdout=out)
+        self.assertEqual(out.getvalue(), self.export("attendance", "csv"))
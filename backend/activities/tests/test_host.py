@@ -3,6 +3,8 @@ import json
 
 import django.test
 from django import urls
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from .. import models
@@ -172,3 +174,34 @@ class GrantRemoveHostTest(django.test.TestCase):
         response_dict = json.loads(response.content)
         self.assertEqual(response.status_code, 403)
         self.assertEqual(response_dict["message"], "Authentication credentials were not provided.")
+
+    def test_bulk_grant_and_remove_host(self):
+        """Granting or removing many hosts should take as many queries as a single one."""
+        participants = [create_test_user(f"participant{i}") for i in range(5)]
+        for participant in participants:
+            client_join_activity(client=self.client, user=participant, activity=self.activity)
+        self.client.force_login(self.owner)
+        user_ids = [participant.id for participant in participants]
+
+        with CaptureQueriesContext(connection) as single:
+            put_request_json_data(self.url, self.client, {"grant_host": [self.participant.id]})
+        with CaptureQueriesContext(connection) as bulk:
+            response = put_request_json_data(self.url, self.client, {"grant_host": user_ids})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(bulk.captured_queries), len(single.captured_queries))
+        self.assertEqual(self.activity.host(), [self.owner, self.participant, *participants])
+        self.assertTrue(all(self.attend(participant).checked_in for participant in participants))
+
+        with CaptureQueriesContext(connection) as bulk:
+            response = put_request_json_data(self.url, self.client, {"remove_host": user_ids})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(bulk.captured_queries), len(single.captured_queries))
+        self.assertEqual(self.activity.host(), [self.owner, self.participant])
+        self.assertFalse(any(self.attend(participant).checked_in for participant in participants))
+
+    def test_bulk_grant_host_is_validated_as_a_whole(self):
+        """Nobody should become host when one of the given users is not a member."""
+        response = put_request_json_data(self.url, self.client, {"grant_host": [self.participant.id, self.user.id]})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()["message"], f"Cannot find user {self.user.username} in this activity.")
+        self.assertEqual(self.activity.host(), [self.owner])
@@ -1,11 +1,26 @@
 """Module to test on index page of activities app."""
 import json
+from io import StringIO
+from unittest import mock
 
 import django.test
+from activities import models
+from activities.cache import bump_index_version
+from activities.geo import geohash_encode
+from activities.snapshot import SNAPSHOT_JOB
+from activities.views.activity_list import ActivityList
 from django import urls
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from activities.models import JobLease
 
-from .shortcuts import (activity_to_json, convert_day_num, create_activity,
-                        create_test_user, date_from_now)
+from .shortcuts import (activity_to_json, client_join_activity,
+                        convert_day_num, create_activity, create_test_user,
+                        date_from_now)
 
 
 class IndexTest(django.test.TestCase):
@@ -96,6 +111,10 @@ class IndexTest(django.test.TestCase):
         res_dict = json.loads(response.content)
         self.assertEqual(res_dict['results'], [json_act1, json_act2, json_act3])
 
+        response = self.client.get(urls.reverse("activities:index") + "?keyword=TEST")
+        res_dict = json.loads(response.content)
+        self.assertEqual(res_dict['results'], [json_act2])
+
         response = self.client.get(urls.reverse("activities:index") + "?keyword=")
         res_dict = json.loads(response.content)
         self.assertEqual(res_dict['results'], [json_act1, json_act2, json_act3])
@@ -104,6 +123,57 @@ class IndexTest(django.test.TestCase):
         res_dict = json.loads(response.content)
         self.assertEqual(res_dict['results'], [])
 
+    def test_search_rank_name_before_detail(self):
+        """Activities match keyword by name should be ranked before activities match by detail."""
+        _, detail_match = create_activity(
+            host=self.host_user,
+            data={"name": "Board game", "detail": "Bring your chess set"},
+            days_delta=1
+        )
+        _, name_match = create_activity(
+            host=self.host_user,
+            data={"name": "Chess club", "detail": "Weekly meeting"},
+            days_delta=2
+        )
+
+        response = self.client.get(urls.reverse("activities:index") + "?keyword=ches")
+        res_dict = json.loads(response.content)
+        self.assertEqual(res_dict['results'], [activity_to_json(name_match), activity_to_json(detail_match)])
+
+        response = self.client.get(urls.reverse("activities:index") + "?keyword=chess wee")
+        res_dict = json.loads(response.content)
+        self.assertEqual(res_dict['results'], [activity_to_json(name_match)])
+
+    def test_search_inside_phrase(self):
+        """Term inside a phrase without spaces should be found, after activities with words starting with it."""
+        _, phrase_match = create_activity(
+            host=self.host_user,
+            data={"name": "weeklychessclub", "detail": "hello"},
+            days_delta=1
+        )
+        _, word_match = create_activity(
+            host=self.host_user,
+            data={"name": "Club of chess", "detail": "hello"},
+            days_delta=2
+        )
+
+        response = self.client.get(urls.reverse("activities:index") + "?keyword=club")
+        res_dict = json.loads(response.content)
+        self.assertEqual(res_dict['results'], [activity_to_json(word_match), activity_to_json(phrase_match)])
+
+    def test_search_with_special_character(self):
+        """Keyword with special character should be searched by its words only."""
+        _, activity = create_activity(host=self.host_user, data={"name": "C++ (beginner)", "detail": "hello"})
+
+        response = self.client.get(urls.reverse("activities:index") + "?keyword=(beginner")
+        self.assertEqual(response.status_code, 200)
+        res_dict = json.loads(response.content)
+        self.assertEqual(res_dict['results'], [activity_to_json(activity)])
+
+        response = self.client.get(urls.reverse("activities:index") + "?keyword=%2B%2B(")
+        res_dict = json.loads(response.content)
+        self.assertEqual(res_dict['results'], [activity_to_json(activity)])
+
     def test_search_by_day_of_week(self):
         """GET req to index with day code (1 = Sunday), index should return list of activity on that day."""
         _, activity1 = create_activity(
@@ -283,3 +353,510 @@ class IndexTest(django.test.TestCase):
         response = self.client.get(urls.reverse("activities:index") + "?end_date=")
         res_dict = json.loads(response.content)
         self.assertEqual(res_dict['results'], [json_act1, json_act2, json_act3, json_act7])
+
+    def test_filter_in_user_timezone(self):
+        """Day and date range filter should use local time of user without wrapping date column in expression."""
+        sunday_night = timezone.datetime(2030, 1, 6, 20, 0, tzinfo=timezone.get_current_timezone())
+        activity = models.Activity.objects.create(
+            owner=self.host_user, name="late", detail="hello",
+            date=sunday_night, end_date=sunday_night, end_registration_date=sunday_night
+        )
+        utc_plus_7 = {"HTTP_TZOFFSET": "-420"}
+
+        def get_ids(query, **headers):
+            response = self.client.get(self.url + query, **headers)
+            return [act['id'] for act in json.loads(response.content)['results']]
+
+        self.assertEqual(get_ids("?day=1"), [activity.id])
+        self.assertEqual(get_ids("?day=1", **utc_plus_7), [])
+        self.assertEqual(get_ids("?day=2,3", **utc_plus_7), [activity.id])
+
+        self.assertEqual(get_ids("?start_date=2030-01-07T00:00:00Z"), [])
+        self.assertEqual(get_ids("?start_date=2030-01-07T00:00:00Z", **utc_plus_7), [activity.id])
+        self.assertEqual(get_ids("?end_date=2030-01-06T00:00:00Z", **utc_plus_7), [])
+        self.assertEqual(get_ids("?end_date=2030-01-07T00:00:00Z", **utc_plus_7), [activity.id])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                self.url + "?day=2&start_date=2030-01-01T00:00:00Z&end_date=2030-01-31T00:00:00Z", **utc_plus_7
+            )
+        self.assertEqual([act['id'] for act in json.loads(response.content)['results']], [activity.id])
+        for query in queries:
+            self.assertNotIn('EXTRACT', query['sql'])
+            self.assertNotIn('django_datetime', query['sql'])
+            self.assertNotIn('MIN(', query['sql'])
+
+    def test_week_day_filter_is_bounded(self):
+        """Day filter should expand a bounded number of date ranges, whatever the date span of activities."""
+        far_future = timezone.now() + timezone.timedelta(days=3650)
+        activity = models.Activity.objects.create(
+            owner=self.host_user, name="far", detail="hello",
+            date=far_future, end_date=far_future, end_registration_date=far_future
+        )
+        day = far_future.isoweekday() % 7 + 1
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url + f"?day={day}")
+        self.assertIn(activity.id, [act['id'] for act in json.loads(response.content)['results']])
+        # one range for each week of the horizon, plus activities before today and after the horizon
+        self.assertLess(max(query['sql'].count(' OR ') for query in queries), 20)
+
+    def test_cursor_pagination(self):
+        """Cursor pagination should walk through every activity in (date, id) order without overlap."""
+        same_date = timezone.now() + timezone.timedelta(days=3)
+        activities = [
+            models.Activity.objects.create(owner=self.host_user, name=f"act{i}", detail="hello", date=same_date)
+            for i in range(25)
+        ]
+
+        response = self.client.get(self.url + "?cursor=")
+        res_dict = json.loads(response.content)
+        self.assertNotIn('count', res_dict)
+        self.assertIsNone(res_dict['previous'])
+        self.assertEqual([act['id'] for act in res_dict['results']], [act.id for act in activities[:20]])
+
+        response = self.client.get(res_dict['next'])
+        res_dict = json.loads(response.content)
+        self.assertIsNone(res_dict['next'])
+        self.assertEqual([act['id'] for act in res_dict['results']], [act.id for act in activities[20:]])
+
+        response = self.client.get(res_dict['previous'])
+        res_dict = json.loads(response.content)
+        self.assertIsNone(res_dict['previous'])
+        self.assertEqual([act['id'] for act in res_dict['results']], [act.id for act in activities[:20]])
+
+    def test_cursor_pagination_skip_count(self):
+        """Cursor pagination should not count the filtered activities."""
+        create_activity(host=self.host_user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url + "?cursor=")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any(query['sql'].startswith('SELECT COUNT(*)') for query in queries))
+
+    def test_keyword_search_ignore_cursor(self):
+        """Keyword search should keep its rank order and page by number even when cursor is given."""
+        _, detail_match = create_activity(
+            host=self.host_user,
+            data={"name": "Board game", "detail": "Bring your chess set"},
+            days_delta=1
+        )
+        _, name_match = create_activity(
+            host=self.host_user,
+            data={"name": "Chess club", "detail": "Weekly meeting"},
+            days_delta=2
+        )
+
+        response = self.client.get(self.url + "?cursor=&keyword=chess")
+        res_dict = json.loads(response.content)
+        self.assertIn('count', res_dict)
+        self.assertEqual([act['id'] for act in res_dict['results']], [name_match.id, detail_match.id])
+
+    def test_invalid_cursor(self):
+        """Malformed cursor should respond with not found."""
+        response = self.client.get(self.url + "?cursor=invalid")
+        self.assertEqual(response.status_code, 404)
+        self.assertJSONEqual(response.content, {'message': 'Invalid cursor'})
+
+    @override_settings(ACTIVITY_SNAPSHOT_MAX_AGE=0)
+    def test_constant_number_of_queries(self):
+        """Number of queries for index page should not grow with number of activities."""
+        attendee = create_test_user("Attendee")
+
+        def add_activity(i):
+            location = models.Locations.objects.create(latitude=13.84, longitude=100.57)
+            _, activity = create_activity(host=self.host_user, data={"name": f"act{i}", "detail": "hello"})
+            activity.locations = location
+            activity.save()
+            attachment = models.Attachment.objects.create(activity=activity, image=f"activities/{i}.jpg")
+            client_join_activity(self.client, attendee, activity)
+            self.client.logout()
+            return attachment
+
+        add_activity(0)
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url)
+        self.assertEqual(len(json.loads(response.content)['results']), 1)
+
+        attachments = [add_activity(i) for i in range(1, 3)]
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url)
+        res_dict = json.loads(response.content)
+        self.assertEqual(len(res_dict['results']), 3)
+        self.assertEqual(res_dict['results'][2]['people'], 2)
+        self.assertEqual(res_dict['results'][2]['host'], [self.host_user.id])
+        self.assertEqual(res_dict['results'][2]['images'], [{"id": attachments[-1].id, "url": "/media/activities/2.jpg"}])
+
+    @override_settings(ACTIVITY_SNAPSHOT_MAX_AGE=0)
+    def test_sparse_fieldsets(self):
+        """Index should serialize only requested fields and skip queries of unrequested relations."""
+        _, activity = create_activity(host=self.host_user)
+        models.Attachment.objects.create(activity=activity, image="activities/0.jpg")
+
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url + "?fields=id,name,date,end_date")
+        self.assertEqual(
+            json.loads(response.content)['results'],
+            [{key: activity_to_json(activity)[key] for key in ('id', 'name', 'date', 'end_date')}]
+        )
+
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url + "?omit=host,location")
+        result = json.loads(response.content)['results'][0]
+        self.assertNotIn('host', result)
+        self.assertNotIn('location', result)
+        self.assertEqual(result['images'], [{"id": activity.attachment_set.get().id, "url": "/media/activities/0.jpg"}])
+
+    def test_facets(self):
+        """Facet counts should be computed over filtered activities with one extra query."""
+        sunday = timezone.datetime(2030, 1, 6, 20, 0, tzinfo=timezone.get_current_timezone())
+        location = models.Locations.objects.create(latitude=13.84, longitude=100.57)
+        for i, (date, on_site, max_people) in enumerate([
+            (sunday, True, None),
+            (sunday, False, 1),
+            (sunday + timezone.timedelta(days=1), False, 5),
+            (sunday + timezone.timedelta(days=2), True, 0),
+        ]):
+            activity = models.Activity.objects.create(
+                owner=self.host_user, name=f"facet{i}", detail="hello", date=date, end_date=date,
+                end_registration_date=date, on_site=on_site, locations=location if on_site else None,
+                max_people=max_people
+            )
+            models.Attend.objects.create(user=self.host_user, activity=activity, is_host=True)
+
+        with CaptureQueriesContext(connection) as plain_queries:
+            self.client.get(self.url + "?keyword=facet")
+        with CaptureQueriesContext(connection) as facet_queries:
+            response = self.client.get(self.url + "?keyword=facet&facets=weekday,on_site,free_seats,unknown")
+        self.assertEqual(len(facet_queries), len(plain_queries) + 1)
+
+        res_dict = json.loads(response.content)
+        self.assertEqual(len(res_dict['results']), 4)
+        self.assertEqual(res_dict['facets'], {
+            "weekday": {"1": 2, "2": 1, "3": 1, "4": 0, "5": 0, "6": 0, "7": 0},
+            "on_site": {"true": 2, "false": 2},
+            "free_seats": {"true": 3, "false": 1},
+        })
+
+        response = self.client.get(self.url + "?day=2&facets=weekday", HTTP_TZOFFSET="-420")
+        self.assertEqual(json.loads(response.content)['facets'], {
+            "weekday": {"1": 0, "2": 2, "3": 0, "4": 0, "5": 0, "6": 0, "7": 0},
+        })
+
+        response = self.client.get(self.url + "?facets=unknown")
+        self.assertNotIn('facets', json.loads(response.content))
+
+
+class NearSearchTest(django.test.TestCase):
+    """Test Cases for searching activity near a coordinate."""
+
+    def setUp(self):
+        """Set up activities at different distance from Kasetsart University."""
+        self.url = urls.reverse("activities:index")
+        self.host_user = create_test_user("Host")
+        self.near = "?near=13.8476,100.5696"
+
+        def create_on_site(name, lat, lon):
+            _, act = create_activity(
+                host=self.host_user,
+                data={"name": name, "detail": "hello", "location": {"lat": lat, "lon": lon}}
+            )
+            return act
+
+        self.act_here = create_on_site("here", 13.8476, 100.5696)
+        self.act_3km = create_on_site("3km", 13.8746, 100.5696)
+        self.act_20km = create_on_site("20km", 13.7563, 100.5018)
+        self.act_online = create_activity(host=self.host_user, data={"name": "online", "detail": "hello"})[1]
+
+    def get_ids(self, query):
+        """Return list of activity id in response of given query."""
+        response = self.client.get(self.url + query)
+        return [act['id'] for act in json.loads(response.content)['results']]
+
+    def test_geohash_kept_in_sync(self):
+        """Geohash of location should be computed on create and updated when location is edited."""
+        location = self.act_here.locations
+        self.assertEqual(location.geohash, geohash_encode(13.8476, 100.5696))
+
+        location.latitude, location.longitude = 57.64911, 10.40744
+        location.save()
+        location.refresh_from_db()
+        self.assertTrue(location.geohash.startswith("u4pruydqq"))
+
+    def test_search_near(self):
+        """Only on-site activities within radius should be returned."""
+        self.assertEqual(self.get_ids(self.near), [self.act_here.id, self.act_3km.id])
+        self.assertEqual(self.get_ids(self.near + "&radius=1"), [self.act_here.id])
+        self.assertEqual(self.get_ids(self.near + "&radius=20"), [self.act_here.id, self.act_3km.id, self.act_20km.id])
+
+    def test_search_near_inside_box_but_outside_radius(self):
+        """Activity in the corner of bounding box should be excluded by exact distance."""
+        act_corner = models.Activity.objects.create(
+            owner=self.host_user, name="corner", detail="hello", on_site=True,
+            locations=models.Locations.objects.create(latitude=13.8876, longitude=100.6096)
+        )
+        self.assertNotIn(act_corner.id, self.get_ids(self.near + "&radius=5"))
+        self.assertIn(act_corner.id, self.get_ids(self.near + "&radius=7"))
+
+    def test_invalid_near(self):
+        """Invalid near or radius parameter should be ignored."""
+        all_ids = [self.act_here.id, self.act_3km.id, self.act_20km.id, self.act_online.id]
+        self.assertEqual(self.get_ids("?near=abc"), all_ids)
+        self.assertEqual(self.get_ids("?near=13.8476"), all_ids)
+        self.assertEqual(self.get_ids("?near=91,100"), all_ids)
+        self.assertEqual(self.get_ids(self.near + "&radius=-1"), all_ids)
+
+
+class IndexCacheTest(django.test.TestCase):
+    """Test Cases for cached response of Index view."""
+
+    def setUp(self):
+        """Set up the common URL and an activity."""
+        self.url = urls.reverse("activities:index")
+        self.host_user = create_test_user("Host")
+        _, self.activity = create_activity(host=self.host_user)
+        self.client.logout()
+
+    def test_repeated_request_hit_cache(self):
+        """Same request should be served from cache without any query."""
+        response = self.client.get(self.url + "?keyword=test&day=1,2")
+        with self.assertNumQueries(0):
+            cached = self.client.get(self.url + "?day=1,2&keyword=test")
+        self.assertEqual(response.content, cached.content)
+
+    def test_different_param_and_tzoffset_not_share_cache(self):
+        """Request with different query parameters or tzoffset should not be served from the same cache."""
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url + "?keyword=test")
+            self.client.get(self.url, headers={'tzoffset': '-420'})
+        self.assertGreater(len(queries), 0)
+
+        with self.assertNumQueries(0):
+            self.client.get(self.url, headers={'tzoffset': '-420'})
+
+    def test_join_invalidate_cache(self):
+        """Cached index should be invalidated when someone join an activity."""
+        res_dict = json.loads(self.client.get(self.url).content)
+        self.assertEqual(res_dict['results'][0]['people'], 1)
+
+        client_join_activity(self.client, create_test_user("Attendee"), self.activity)
+        self.client.logout()
+
+        res_dict = json.loads(self.client.get(self.url).content)
+        self.assertEqual(res_dict['results'][0]['people'], 2)
+
+    def test_edit_invalidate_cache(self):
+        """Cached index should be invalidated when activity, attachment or location changed."""
+        self.client.get(self.url)
+
+        self.activity.name = "Renamed"
+        self.activity.save()
+        res_dict = json.loads(self.client.get(self.url).content)
+        self.assertEqual(res_dict['results'][0]['name'], "Renamed")
+
+        attachment = models.Attachment.objects.create(activity=self.activity, image="activities/a.jpg")
+        res_dict = json.loads(self.client.get(self.url).content)
+        self.assertEqual(res_dict['results'][0]['images'], [{"id": attachment.id, "url": "/media/activities/a.jpg"}])
+
+        location = models.Locations.objects.create(latitude=13.84, longitude=100.57)
+        self.activity.locations = location
+        self.activity.save()
+        self.client.get(self.url)
+        location.latitude = 14
+        location.save()
+        res_dict = json.loads(self.client.get(self.url).content)
+        self.assertEqual(res_dict['results'][0]['location']['lat'], 14)
+
+    def test_bump_during_request_not_served(self):
+        """Response built before a version bump should not be served after the bump."""
+        list_activities = ActivityList.list
+
+        def list_then_bump(view, *args, **kwargs):
+            res = list_activities(view, *args, **kwargs)
+            bump_index_version()
+            return res
+
+        with mock.patch.object(ActivityList, 'list', list_then_bump):
+            self.client.get(self.url)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        self.assertGreater(len(queries), 0)
+
+    @override_settings(ACTIVITY_INDEX_CACHE_TIMEOUT=0)
+    def test_disable_cache(self):
+        """Index should not be cached if cache timeout is 0."""
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        self.assertGreater(len(queries), 0)
+
+
+@override_settings(ACTIVITY_INDEX_CACHE_TIMEOUT=0)
+class SnapshotTest(django.test.TestCase):
+    """Test Cases for serving activity index from snapshot of upcoming activities."""
+
+    def setUp(self):
+        """Create an activity and build the snapshot."""
+        self.url = urls.reverse("activities:index")
+        self.host_user = create_test_user("Host")
+        _, self.activity = create_activity(host=self.host_user, data={"name": "snap", "detail": "hello"})
+        call_command('refresh_activity_snapshot', stdout=StringIO())
+
+    def get_results(self, query=""):
+        """Return results of index request."""
+        return json.loads(self.client.get(self.url + query).content)['results']
+
+    def test_read_from_snapshot(self):
+        """Index should be read from snapshot in fixed number of queries without touching activity table."""
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(3):
+                create_activity(host=self.host_user, data={"name": f"act{i}", "detail": "hello"})
+        self.client.logout()
+
+        # freshness of snapshot, count and page
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(len(queries), 3)
+        self.assertFalse(any('"activities_activity"' in query['sql'] for query in queries))
+        self.assertEqual(len(json.loads(response.content)['results']), 4)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url + "?cursor=&fields=id,name")
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(json.loads(response.content)['results'][0], {"id": self.activity.id, "name": "snap"})
+
+    def test_write_refresh_snapshot(self):
+        """Join, leave, kick, edit, cancel and delete should be reflected in snapshot once committed."""
+        attendees = [create_test_user(f"attendee{i}") for i in range(3)]
+        with self.captureOnCommitCallbacks(execute=True):
+            for attendee in attendees:
+                client_join_activity(self.client, attendee, self.activity)
+        self.assertEqual(self.get_results()[0]['people'], 4)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.activity.attend_set.get(user=attendees[0]).delete()
+        self.assertEqual(self.get_results()[0]['people'], 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.activity.remove_attendees(self.activity.attend_set.filter(user__in=attendees[1:]))
+        self.assertEqual(self.get_results()[0]['people'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            location = models.Locations.objects.create(latitude=13.84, longitude=100.57)
+            self.activity.locations = location
+            self.activity.save()
+            location.latitude = 14
+            location.save()
+        self.assertEqual(self.get_results()[0]['location'], {"lat": 14.0, "lon": 100.57})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.activity.is_cancelled = True
+            self.activity.save()
+        self.assertEqual(self.get_results(), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.activity.is_cancelled = False
+            self.activity.save()
+        self.assertEqual(len(self.get_results()), 1)
+
+        self.activity.delete()
+        self.assertEqual(self.get_results(), [])
+        self.assertFalse(models.ActivitySnapshot.objects.exists())
+
+    def test_join_not_refresh_snapshot_in_transaction(self):
+        """Join should not serialize the activity while its row is locked, snapshot is refreshed after commit."""
+        attendee = create_test_user("attendee")
+        with self.captureOnCommitCallbacks() as callbacks:
+            with CaptureQueriesContext(connection) as queries:
+                client_join_activity(self.client, attendee, self.activity)
+        self.assertFalse(any('activities_activitysnapshot' in query['sql'] for query in queries))
+        self.assertEqual(models.ActivitySnapshot.objects.get().data['people'], 1)
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(models.ActivitySnapshot.objects.get().data['people'], 2)
+
+    def test_stale_snapshot_is_not_served(self):
+        """Snapshot not rebuilt by the command lately should be bypassed, request should never rebuild it."""
+        models.Activity.objects.filter(pk=self.activity.id).update(name="renamed")
+        self.assertEqual(self.get_results()[0]['name'], "snap")
+
+        JobLease.objects.filter(name=SNAPSHOT_JOB).update(last_finished_at=timezone.now() - timezone.timedelta(days=1))
+        self.assertEqual(self.get_results()[0]['name'], "renamed")
+        self.assertEqual(models.ActivitySnapshot.objects.get().data['name'], "snap")
+
+        call_command('refresh_activity_snapshot', stdout=StringIO())
+        self.assertEqual(models.ActivitySnapshot.objects.get().data['name'], "renamed")
+
+    def test_refresh_command_skipped_while_other_worker_rebuilds(self):
+        """Only one worker should rebuild snapshot at a time."""
+        JobLease.acquire(SNAPSHOT_JOB, 'other', 60)
+        out = StringIO()
+        call_command('refresh_activity_snapshot', stdout=out)
+        self.assertIn('Another worker is rebuilding snapshot, skipped.', out.getvalue())
+
+    def test_filter_bypass_snapshot(self):
+        """Request with filter should be answered from activity table."""
+        models.Activity.objects.filter(pk=self.activity.id).update(name="renamed")
+        self.assertEqual(self.get_results("?keyword=renamed")[0]['name'], "renamed")
+
+    def test_refresh_command(self):
+        """Management command should rebuild snapshot."""
+        models.ActivitySnapshot.objects.all().delete()
+        out = StringIO()
+        call_command('refresh_activity_snapshot', stdout=out)
+        self.assertIn('Rebuilt snapshot of 1 activities.', out.getvalue())
+        self.assertEqual(self.get_results(), [activity_to_json(self.activity)])
+
+
+class SuggestTest(django.test.TestCase):
+    """Test Cases for activity name suggestion."""
+
+    def setUp(self):
+        """Create activities with similar names."""
+        self.url = urls.reverse("activities:suggest")
+        self.host_user = create_test_user("Host")
+        self.activities = [
+            create_activity(host=self.host_user, data={"name": name, "detail": "hello"}, days_delta=i + 1)[1]
+            for i, name in enumerate(["Yoga morning", "yoga evening", "Morning yoga", "50% off_sale"])
+        ]
+
+    def get_suggestions(self, query):
+        """Return suggestions for given q."""
+        return json.loads(self.client.get(self.url, {"q": query}).content)
+
+    def test_suggest_prefix(self):
+        """Only activities which name start with q should be suggested, soonest first."""
+        yoga_morning, yoga_evening, _, sale = self.activities
+        expected = [{"id": yoga_morning.id, "name": "Yoga morning"}, {"id": yoga_evening.id, "name": "yoga evening"}]
+        self.assertEqual(self.get_suggestions("yo"), expected)
+        self.assertEqual(self.get_suggestions(" YOGA "), expected)
+        self.assertEqual(self.get_suggestions("50%"), [{"id": sale.id, "name": "50% off_sale"}])
+        self.assertEqual(self.get_suggestions("5_"), [])
+        self.assertEqual(self.get_suggestions(""), [])
+
+    def test_suggest_exclude_unavailable(self):
+        """Cancelled activities should not be suggested."""
+        self.activities[0].is_cancelled = True
+        self.activities[0].save()
+        self.assertEqual(self.get_suggestions("yoga"), [{"id": self.activities[1].id, "name": "yoga evening"}])
+
+    def test_suggest_limit(self):
+        """Number of suggestions should be limited."""
+        for i in range(12):
+            create_activity(host=self.host_user, data={"name": f"Run {i}", "detail": "hello"})
+        self.assertEqual(len(self.get_suggestions("run")), 10)
+
+    def test_suggest_cached(self):
+        """Hot prefix should be answered from cache without query, ignoring case."""
+        self.get_suggestions("Yoga")
+        with self.assertNumQueries(0):
+            suggestions = self.get_suggestions("yOGA")
+        self.assertEqual(len(suggestions), 2)
+
+        with override_settings(ACTIVITY_SUGGEST_CACHE_TIMEOUT=0):
+            with self.assertNumQueries(1):
+                self.get_suggestions("yoga")
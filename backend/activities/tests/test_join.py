@@ -1,6 +1,15 @@
 """Test for Join function."""
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
 import django.test
+from activities import models
 from django import urls
+from django.contrib.auth.models import User
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+from profiles.models import Profile
 
 from .shortcuts import client_join_activity, create_activity, create_test_user
 
@@ -171,6 +180,28 @@ class JoinTest(django.test.TestCase):
         self.assertEqual(res.status_code, 403)
         self.assertJSONEqual(res.content, {"message": "The number of activities you have joined has reached the limit"})
 
+    def test_join_eligibility_in_one_query(self):
+        """Every join condition should be checked by one query, whatever user has joined before."""
+        activities = [create_activity(host=self.host)[1] for _ in range(3)]
+        attendee = create_test_user("Attend")
+        self.client.force_login(attendee)
+
+        with CaptureQueriesContext(connection) as first_join:
+            self.client.post(self.url(activities[0].id))
+        self.client.post(self.url(activities[1].id))
+        with CaptureQueriesContext(connection) as third_join:
+            response = self.client.post(self.url(activities[2].id))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(third_join.captured_queries), len(first_join.captured_queries))
+
+        with CaptureQueriesContext(connection) as rejoin:
+            response = self.client.post(self.url(activities[2].id))
+        self.assertEqual(response.status_code, 403)
+        self.assertJSONEqual(response.content, {"message": f"You've already joined the activity {activities[2].name}."})
+        # session, user, user and activity of serializer fields, eligibility
+        self.assertEqual(len(rejoin.captured_queries), 5)
+        self.assertIn('"profiles_profile"', rejoin.captured_queries[-1]['sql'])
+
     def test_user_with_rep_score_more_then_activity_min(self):
         """User with reputation score more then activity minimum score will able to join that activity."""
         _, act_with_min_rep = create_activity(
@@ -250,3 +281,49 @@ class JoinTest(django.test.TestCase):
         client_join_activity(client=self.client, user=attendee, activity=act)
         res = self.client.get(f'/activities/{act.id}/is-joined/')
         self.assertJSONEqual(res.content, {'is_joined': True, 'is_checked_in': False})
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Concurrent join need row-level locking of PostgreSQL.')
+class ConcurrentJoinTest(django.test.TransactionTestCase):
+    """Test join under many simultaneous requests."""
+
+    NUM_REQUESTS = 200
+    MAX_PEOPLE = 10
+
+    def test_concurrent_join_never_overbook(self):
+        """Activity should never have more people than max_people however many user join at the same time."""
+        host = create_test_user("Host")
+        _, activity = create_activity(
+            host=host,
+            data={"name": "Popular", "detail": "Everyone want to join", "max_people": self.MAX_PEOPLE}
+        )
+        users = User.objects.bulk_create([User(username=f"user{i}") for i in range(self.NUM_REQUESTS)])
+        Profile.objects.bulk_create([Profile(user=user, ku_generation=80, faculty="Faculty") for user in users])
+
+        clients = []
+        for user in users:
+            client = django.test.Client()
+            client.force_login(user)
+            clients.append(client)
+
+        url = urls.reverse("activities:join", args=[activity.id])
+        barrier = threading.Barrier(20)
+
+        def join(client):
+            try:
+                barrier.wait(timeout=1)
+            except threading.BrokenBarrierError:
+                pass
+            try:
+                return client.post(url).status_code
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=20) as executor:
+            status_codes = list(executor.map(join, clients))
+
+        activity.refresh_from_db()
+        self.assertEqual(status_codes.count(201), self.MAX_PEOPLE - 1)
+        self.assertEqual(status_codes.count(403), self.NUM_REQUESTS - self.MAX_PEOPLE + 1)
+        self.assertEqual(activity.people, self.MAX_PEOPLE)
+        self.assertEqual(activity.attend_set.count(), self.MAX_PEOPLE)
@@ -0,0 +1,95 @@
+"""Module to test that hot queries are served by index scans."""
+import re
+import unittest
+
+import django.test
+from activities import models
+from chat.models import Message
+from django import urls
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .shortcuts import create_test_user
+
+INDEXED_TABLES = ['activities_activity', 'activities_attend', 'chat_message']
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Query plan is checked with EXPLAIN of PostgreSQL.')
+class QueryPlanTest(django.test.TestCase):
+    """Test that main endpoints do not scan whole activity, attend and message table."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Seed mostly ended activities with attendees and messages, then update planner statistics."""
+        cls.host_user = create_test_user("Host")
+        cls.users = [create_test_user(f"user{i}") for i in range(20)]
+        now = timezone.now()
+
+        activities = []
+        for i in range(3000):
+            date = now + timezone.timedelta(days=i - 2950)
+            activities.append(models.Activity(
+                owner=cls.host_user, name=f"act{i}", detail="hello", date=date, end_date=date,
+                end_registration_date=date, is_cancelled=(i % 10 == 0)
+            ))
+        activities = models.Activity.objects.bulk_create(activities)
+        cls.activity = activities[-1]
+
+        hosts = [models.Attend(user=cls.host_user, activity=act, is_host=True) for act in activities]
+        participants = [models.Attend(user=user, activity=act) for act in activities[::5] for user in cls.users]
+        models.Attend.objects.bulk_create(hosts + participants)
+        Message.objects.bulk_create(
+            [Message(message="hi", sender=cls.host_user, activity=act) for act in activities for _ in range(3)]
+        )
+
+        with connection.cursor() as cursor:
+            for table in INDEXED_TABLES:
+                cursor.execute(f'ANALYZE {table}')
+
+    def assert_no_seq_scan(self, url):
+        """Request given url and assert that no query on indexed tables uses sequential scan."""
+        self.client.force_login(self.host_user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        with connection.cursor() as cursor:
+            for query in queries:
+                if not query['sql'].startswith('SELECT'):
+                    continue
+                cursor.execute(f"EXPLAIN {query['sql']}")
+                plan = '\n'.join(row[0] for row in cursor.fetchall())
+                for table in INDEXED_TABLES:
+                    self.assertIsNone(
+                        re.search(rf'Seq Scan on {table}\b', plan), f"{query['sql']}\n{plan}"
+                    )
+
+    def test_index_use_index(self):
+        """Activity index should only read upcoming activities through index."""
+        self.assert_no_seq_scan(urls.reverse("activities:index"))
+        self.assert_no_seq_scan(urls.reverse("activities:index") + "?cursor=")
+
+    def test_keyword_search_use_index(self):
+        """Keyword search should match terms anywhere in name and detail through trigram indexes."""
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            if cursor.fetchone() is None:
+                self.skipTest('pg_trgm extension is not available.')
+        self.assert_no_seq_scan(urls.reverse("activities:index") + "?keyword=ct29")
+
+    def test_suggest_use_index(self):
+        """Name suggestion should match prefix through index."""
+        self.assert_no_seq_scan(urls.reverse("activities:suggest") + "?q=ACT29")
+
+    def test_detail_use_index(self):
+        """Activity detail should read hosts and attachments through index."""
+        self.assert_no_seq_scan(urls.reverse("activities:detail", args=[self.activity.id]))
+
+    def test_chat_use_index(self):
+        """Chat message list should read messages of the activity through index."""
+        self.assert_no_seq_scan(urls.reverse("chat_message_list", args=[self.activity.id]))
+
+    def test_profile_use_index(self):
+        """Profile detail should count active activity of the user through index."""
+        self.assert_no_seq_scan(urls.reverse("profiles:detail", args=[self.users[0].username]))
@@ -1,5 +1,5 @@
 """URL configuration for activities app."""
-from django.urls import path
+from django.urls import path, re_path
 
 from . import views
 
@@ -7,8 +7,16 @@ app_name = "activities"
 urlpatterns = [
     path("", views.ActivityList.as_view(), name="index"),
     path("<int:pk>/", views.ActivityDetail.as_view(), name="detail"),
+    path("batch/", views.ActivityBatch.as_view(), name="batch"),
+    path("suggest/", views.ActivitySuggest.as_view(), name="suggest"),
+    re_path(
+        r"^export/(?P<dataset>activities|attendance)\.(?P<file_format>ndjson|csv)$",
+        views.ActivityExport.as_view(),
+        name="export"
+    ),
     path("join/<int:pk>/", views.JoinLeaveView.as_view(), name="join"),
     path("check-in/<int:pk>/", views.CheckInView.as_view(), name="checkin"),
+    path("check-in/<int:pk>/token/", views.CheckInTokenView.as_view(), name="checkin-token"),
     path("participant/<int:pk>/", views.ParticipantList.as_view(), name="participant"),
     path("participant/<int:pk>/search-participants/", views.ParticipantList.as_view(), name="participant"),
 
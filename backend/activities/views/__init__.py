@@ -1,7 +1,10 @@
 from .activity_list import ActivityList
 from .activity_detail import ActivityDetail
+from .activity_batch import ActivityBatch
+from .activity_suggest import ActivitySuggest
+from .activity_export import ActivityExport
 from .activity_join import JoinLeaveView
-from .activity_checkin import CheckInView
+from .activity_checkin import CheckInView, CheckInTokenView
 from .activity_paticipant import ParticipantList
 
 from .util import *
\ No newline at end of file
@@ -0,0 +1,63 @@
+"""Module for handle URL /activities/batch/."""
+from typing import Any
+
+from activities import models
+from activities.serializer import model_serializers
+from activities.serializer.permissions import OnlyHostCanEdit
+from django.db.models import QuerySet
+from django.http import HttpRequest
+from rest_framework import exceptions, generics, permissions, response
+
+
+class ActivityBatch(generics.GenericAPIView):
+    """Return detail of many activities in one request, in the same order as the requested ids."""
+
+    queryset = models.Activity.objects.all()
+    serializer_class = model_serializers.ActivitiesSerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly, OnlyHostCanEdit]
+    max_batch_size = 100
+
+    def get_queryset(self) -> QuerySet:
+        """Eager load data for serializing activities."""
+        return self.get_serializer_class().setup_eager_loading(super().get_queryset(), self.request.query_params)
+
+    def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> response.Response:
+        """Handle get request by return detail of every activity in ids query parameter.
+
+        Ids of activities that do not exist or the user has no permission to see are listed in not_found.
+
+        :param request: Http request object
+        :return: Http response object
+        """
+        ids = self.__parse_ids()
+        activities = {
+            activity.id: activity for activity in self.get_queryset().filter(pk__in=ids)
+            if self.__has_object_permission(activity)
+        }
+
+        serializer = self.get_serializer([activities[pk] for pk in ids if pk in activities], many=True)
+        return response.Response({
+            "results": serializer.data,
+            "not_found": [pk for pk in ids if pk not in activities],
+        })
+
+    def __has_object_permission(self, activity: models.Activity) -> bool:
+        """Return whether user can see the activity, with the same permissions as activity detail."""
+        return all(
+            permission.has_object_permission(self.request, self, activity) for permission in self.get_permissions()
+        )
+
+    def __parse_ids(self) -> list[int]:
+        """Return unique activity ids from comma separated ids query parameter.
+
+        :raises exceptions.ParseError: If ids is missing, malformed or contains too many ids.
+        """
+        try:
+            ids = [int(pk) for pk in self.request.query_params.get('ids', '').split(',')]
+        except ValueError:
+            raise exceptions.ParseError('ids must be comma separated activity ids.')
+
+        ids = list(dict.fromkeys(ids))
+        if len(ids) > self.max_batch_size:
+            raise exceptions.ParseError(f'Cannot request more than {self.max_batch_size} activities at once.')
+        return ids
@@ -1,15 +1,22 @@
 """Module for handle URL /activities/<activity_id>."""
 
+from datetime import datetime
+from datetime import timezone as dt_timezone
 from typing import Any
 
 from activities import models
+from activities.checkin_token import (CheckInTokenExpired, InvalidCheckInToken,
+                                      make_check_in_token, nonce_matches,
+                                      read_check_in_token)
 from activities.logger import Action, RequestData, data_to_log, logger
 from activities.serializer import model_serializers
 from activities.serializer.permissions import (MustBeMember, OnlyHostCanEdit,
                                                OnlyHostCanGet)
-from django.http import HttpRequest
+from django.db import transaction
+from django.http import Http404, HttpRequest
 from django.utils import timezone
-from rest_framework import generics, mixins, permissions, response
+from profiles.models import Profile
+from rest_framework import exceptions, generics, mixins, permissions, response
 
 
 class CheckInView(
@@ -21,12 +28,14 @@ class CheckInView(
     queryset = models.Activity.objects.filter(end_date__gte=timezone.now())
     serializer_class = model_serializers.ActivitiesSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, OnlyHostCanEdit, OnlyHostCanGet, MustBeMember]
+    max_bulk_size = 500
 
     def __init__(self, **kwargs: Any) -> None:
         """Set up function for handling open/close checkin."""
         self.status_change_method = {
             'open': self.open_check_in,
-            'close': self.close_check_in
+            'close': self.close_check_in,
+            'bulk': self.bulk_check_in
         }
         super().__init__(**kwargs)
 
@@ -64,45 +73,70 @@ class CheckInView(
     def post(self, request: HttpRequest, *args: Any, **kwargs: Any) -> response.Response:
         """Handle POST request by check-in user.
 
+        Attendees check-in in a burst at the event start, so the activity is not loaded:
+        check-in state is read with one lookup, then check-in and reputation are each one conditional update.
+        User send either check_in_code or check_in_token scanned from the host QR code.
+
         :param request: Http request object
         :return: Http response object
         """
         code = request.data.get('check_in_code', 'no')
-        activity = self.get_object()
+        activity_id = kwargs['pk']
 
-        req_data = RequestData(req_user=request.user, act_id=activity.id)
+        state = models.Activity.objects.filter(pk=activity_id, end_date__gte=timezone.now()).values(
+            'name', 'check_in_allowed', 'check_in_code'
+        ).first()
+        if state is None:
+            raise Http404
 
-        if not activity.check_in_allowed:
+        req_data = RequestData(req_user=request.user, act_id=activity_id)
+
+        if not state['check_in_allowed']:
             return response.Response(
                 {'message': 'Check-in are not allow at the moment'},
                 status=403
             )
 
-        if not activity.verified_check_in_code(code):
+        token = request.data.get('check_in_token')
+        if token is not None:
+            try:
+                valid = nonce_matches(read_check_in_token(str(token), activity_id), state['check_in_code'])
+            except CheckInTokenExpired:
+                logger.warning(data_to_log(Action.FAIL_CHECKIN, req_data, 'Token expired'))
+                return response.Response(
+                    {'message': 'Check-in QR code expired'},
+                    status=403
+                )
+            except InvalidCheckInToken:
+                valid = False
+        else:
+            valid = bool(state['check_in_code']) and state['check_in_code'] == code
+
+        if not valid:
             logger.warning(data_to_log(Action.FAIL_CHECKIN, req_data, 'Invalid code'))
             return response.Response(
                 {'message': 'Check-in code invalid'},
                 status=403
             )
 
-        attend = activity.attend_set.get(user=request.user)
-
-        if attend.checked_in:
-            logger.warning(data_to_log(Action.FAIL_CHECKIN, req_data, "Already check-in"))
-            return response.Response(
-                {'message': f"You've already check-in to this {activity.name}"},
-                status=403
-            )
+        # Attend rows are not saved, nothing that depend on the activity updated_at show check-in status.
+        with transaction.atomic():
+            attends = models.Attend.objects.filter(activity_id=activity_id, user=request.user)
+            if not attends.filter(checked_in=False).update(checked_in=True):
+                if not attends.exists():
+                    return response.Response({'message': MustBeMember.message}, status=403)
 
-        attend.checked_in = True
-        attend.save()
+                logger.warning(data_to_log(Action.FAIL_CHECKIN, req_data, "Already check-in"))
+                return response.Response(
+                    {'message': f"You've already check-in to this {state['name']}"},
+                    status=403
+                )
 
-        user_profile = request.user.profile_set.first()
-        user_profile.increase_reputation()
+            Profile.increase_reputation_of(request.user.id)
 
         logger.info(data_to_log(Action.CHECKIN, req_data))
         return response.Response(
-            {'message': f"You've successfully check-in to {activity.name}"}
+            {'message': f"You've successfully check-in to {state['name']}"}
         )
 
     def open_check_in(self, request: HttpRequest, *args: Any, **kwargs: Any) -> response.Response:
@@ -154,6 +188,58 @@ class CheckInView(
             'check_in_allowed': activity.check_in_allowed
         })
 
+    def bulk_check_in(self, request: HttpRequest, *args: Any, **kwargs: Any) -> response.Response:
+        """Check-in attendees given by host in user_ids at once.
+
+        Attendees are checked-in by one update and their reputation increased by another,
+        hosts, non-members and attendees already checked-in are skipped.
+
+        :param request: Http request object
+        :return: Http response object
+        """
+        activity = self.get_object()
+        user_ids = self.__bulk_user_ids(request)
+
+        if not activity.check_in_allowed:
+            return response.Response(
+                {'message': 'Check-in are not allow at the moment'},
+                status=403
+            )
+
+        with transaction.atomic():
+            attends = activity.attend_set.filter(user_id__in=user_ids, is_host=False, checked_in=False)
+            checked_in = list(attends.select_for_update().values_list('user_id', flat=True))
+            if checked_in:
+                models.Attend.objects.filter(activity=activity, user_id__in=checked_in).update(checked_in=True)
+                Profile.increase_reputation_of(*checked_in)
+
+        checked_in_ids = set(checked_in)
+        checked_in = [user_id for user_id in user_ids if user_id in checked_in_ids]
+        skipped = [user_id for user_id in user_ids if user_id not in checked_in_ids]
+
+        req_data = RequestData(req_user=request.user, act_id=activity.id)
+        logger.info(data_to_log(Action.BULK_CHECKIN, req_data, f'users={checked_in}'))
+        return response.Response({
+            'message': f'{len(checked_in)} attendees checked-in to {activity.name}',
+            'checked_in': checked_in,
+            'skipped': skipped
+        })
+
+    def __bulk_user_ids(self, request: HttpRequest) -> list[int]:
+        """Return unique user ids of bulk check-in in given order.
+
+        :param request: Http request object
+        :raises exceptions.ParseError: If user_ids is not a list of ids or contains too many ids.
+        """
+        user_ids = request.data.get('user_ids')
+        if not isinstance(user_ids, list) or not all(isinstance(user_id, int) for user_id in user_ids):
+            raise exceptions.ParseError('user_ids must be a list of user ids.')
+
+        user_ids = list(dict.fromkeys(user_ids))
+        if len(user_ids) > self.max_bulk_size:
+            raise exceptions.ParseError(f'Cannot check-in more than {self.max_bulk_size} attendees at once.')
+        return user_ids
+
     def invalid_status(self, request: HttpRequest, *args: Any, **kwargs: Any) -> response.Response:
         """Return error message when query param is invalid.
 
@@ -163,3 +249,35 @@ class CheckInView(
         return response.Response(
             {'message': 'No status provided.'}
         )
+
+
+class CheckInTokenView(generics.GenericAPIView):
+    """Handle GET req by sign a short-lived check-in token for host to show as QR code."""
+
+    queryset = models.Activity.objects.all()
+    permission_classes = [permissions.IsAuthenticated, OnlyHostCanGet]
+
+    def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> response.Response:
+        """Return check-in token of the current check-in round and its expiry.
+
+        Token is bound to the check-in code stored in database, so it is rotated when check-in is reopened
+        and rejected once it is closed.
+
+        :param request: Http request object
+        :return: Http response object
+        """
+        activity = self.get_object()
+
+        if not activity.check_in_allowed or not activity.check_in_code:
+            return response.Response(
+                {'message': 'Check-in are not allow at the moment'},
+                status=403
+            )
+
+        token, expires = make_check_in_token(activity.id, activity.check_in_code)
+        return response.Response(
+            {
+                'check_in_token': token,
+                'expires_at': datetime.fromtimestamp(expires, tz=dt_timezone.utc)
+            }
+        )
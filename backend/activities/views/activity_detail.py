@@ -1,15 +1,24 @@
 """Module for handle URL /activities/<activity_id>."""
+import hashlib
+from calendar import timegm
+from datetime import datetime
 from typing import Any
 
 from activities import models
 from activities.logger import Action, RequestData, data_to_log, logger
 from activities.serializer import model_serializers
 from activities.serializer.permissions import OnlyHostCanEdit
-from activities.views.util import (create_location, edit_host_access,
-                                   image_deleter, image_loader,
-                                   image_loader_64)
-from django.db.models import Q
-from django.http import HttpRequest
+from activities.signals import deferred_activity_changes
+from activities.views.util import (attachment_saver, create_location,
+                                   edit_host_access, image_decoder_64,
+                                   image_deleter, image_fetcher)
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Q, QuerySet
+from django.http import HttpRequest, HttpResponseBase
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from profiles.models import Profile
 from rest_framework import generics, mixins, permissions, response
 
 
@@ -22,13 +31,35 @@ class ActivityDetail(mixins.RetrieveModelMixin,
     serializer_class = model_serializers.ActivitiesSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, OnlyHostCanEdit]
 
-    def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> response.Response:
-        """Handle get request by return detail of an activity.
+    def get_queryset(self) -> QuerySet:
+        """Eager load data for serializing activity detail on GET request, and owner and location for editing."""
+        queryset = super().get_queryset()
+        if self.request.method == 'GET':
+            queryset = self.get_serializer_class().setup_eager_loading(queryset, self.request.query_params)
+        else:
+            queryset = queryset.select_related('owner', 'locations')
+        return queryset
+
+    def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponseBase:
+        """Handle get request by return detail of an activity, or not modified if client already has it.
 
         :param request: Http request object
         :return: Http response object
         """
-        return self.retrieve(request, *args, **kwargs)
+        updated_at = models.Activity.objects.filter(pk=kwargs['pk']).values_list('updated_at', flat=True).first()
+        if updated_at is None:
+            return self.retrieve(request, *args, **kwargs)
+
+        etag = self.__etag(request, updated_at)
+        last_modified = timegm(updated_at.utctimetuple())
+        res = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if res is None:
+            res = self.retrieve(request, *args, **kwargs)
+
+        res['ETag'] = etag
+        res['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(res, no_cache=True)
+        return res
 
     def put(self, request: HttpRequest, *args: Any, **kwargs: Any) -> response.Response:
         """Handle put request by edit an activity.
@@ -41,58 +72,60 @@ class ActivityDetail(mixins.RetrieveModelMixin,
     def update(self, request: HttpRequest, *args: Any, **kwargs: Any) -> response.Response:
         """Update an activity with new information provided.
 
+        Activity is loaded once and every change is applied in one transaction,
+        so an error response leaves the activity untouched. New images are downloaded
+        or decoded before the transaction is opened.
+
         :param request: Http request object
         :return: Http response object
         """
-        # Checking number of people join
-        check_max_error = self.__check_max_people(request)
-        if check_max_error:
-            return check_max_error
-
-        # Checking owner reputation score
-        rep_error = self.__check_rep_score(request)
-        if rep_error:
-            return rep_error
-
-        # Deal with location.
-        loc_id = self.__edit_location(request)
-        if loc_id:
-            request.data['locations'] = loc_id
-
-        # Update activity information
-        res = super().update(request, partial=True, *args, **kwargs)
-        res_dict = res.data
-
-        # Deal with attachment.
-        self.__add_remove_attachment(request)
-        # Kick attendee
-        self.__kick_attendee(request)
-
-        # Deal with participants
-        err_res = self.__grant_host_remove_host(request)
-        if err_res:
-            return err_res
-
-        req_data = RequestData(req_user=request.user, act_id=res_dict.get("id"))
+        activity = self.get_object()
+        new_images = self.__prepare_new_images(request, activity)
+
+        with transaction.atomic(), deferred_activity_changes():
+            # Checking number of people join and owner reputation score
+            error = self.__check_max_people(request, activity) or self.__check_rep_score(request, activity)
+            if error:
+                return error
+
+            serializer = self.get_serializer(activity, data=request.data, partial=True)
+            serializer.is_valid(raise_exception=True)
+
+            # Deal with location, attachment, kicked attendee and hosts.
+            location_id = self.__edit_location(request, activity)
+            self.__add_remove_attachment(request, activity, new_images)
+            self.__kick_attendee(request, activity)
+            error = self.__grant_host_remove_host(request, activity)
+            if error:
+                transaction.set_rollback(True)
+                return error
+
+            # Update activity information
+            if location_id:
+                serializer.save(locations_id=location_id)
+            else:
+                serializer.save()
+
+        req_data = RequestData(req_user=request.user, act_id=activity.id)
         logger.info(data_to_log(Action.EDIT, req_data))
         return response.Response(
             {
-                "message": f"You have successfully edited the activity {res_dict.get('name')}",
-                "id": res_dict.get("id")
+                "message": f"You have successfully edited the activity {activity.name}",
+                "id": activity.id
             }
         )
 
-    def __check_rep_score(self, request: HttpRequest) -> response.Response | None:
+    def __check_rep_score(self, request: HttpRequest, activity: models.Activity) -> response.Response | None:
         """Check reputation score of owner compare to updated value.
 
         :param request: HttpRequest object
+        :param activity: Activity being edited
         :return: Http response object if minimum reputation score is not valid.
         """
-        activity = self.get_object()
-        owner_profile = activity.owner.profile_set.first()
         min_rep = request.data.get("minimum_reputation_score")
         if min_rep:
-            if min_rep > owner_profile.reputation_score:
+            owner_rep = Profile.objects.filter(user_id=activity.owner_id).values_list('reputation_score', flat=True)
+            if min_rep > owner_rep.first():
                 req_data = RequestData(req_user=request.user, act_id=activity.id)
                 logger.warning(data_to_log(Action.FAIL_EDIT, req_data, 'Owner rep < Min rep'))
                 return response.Response(
@@ -104,12 +137,12 @@ class ActivityDetail(mixins.RetrieveModelMixin,
                 )
         return None
 
-    def __check_max_people(self, request: HttpRequest) -> response.Response | None:
+    def __check_max_people(self, request: HttpRequest, activity: models.Activity) -> response.Response | None:
         """Check max people.
 
         :param request: HttpRequest object
+        :param activity: Activity being edited
         """
-        activity = self.get_object()
         max_people = request.data.get("max_people")
         current_people = activity.people
         if max_people and current_people > max_people:
@@ -123,49 +156,60 @@ class ActivityDetail(mixins.RetrieveModelMixin,
             )
         return None
 
-    def __edit_location(self, request: HttpRequest) -> int | None:
-        activity = self.get_object()
-        coordinate = request.data.get("location", {})
-
-        if coordinate:
-            location = activity.locations
+    def __edit_location(self, request: HttpRequest, activity: models.Activity) -> int | None:
+        """Move activity location, or create one if the activity has none.
 
-            if location:
-                location.latitude = coordinate.get("lat")
-                location.longitude = coordinate.get("lon")
-                location.save()
-                location_id = location.id
-            else:
-                location_id = create_location(coordinate)
+        :param request: HttpRequest object
+        :param activity: Activity being edited
+        :return: Id of newly created location.
+        """
+        coordinate = request.data.get("location", {})
+        if not coordinate:
+            return None
 
-            return int(location_id)
+        location = activity.locations
+        if location is None:
+            return create_location(coordinate)
 
+        location.latitude = coordinate.get("lat")
+        location.longitude = coordinate.get("lon")
+        location.save(update_fields=['latitude', 'longitude'])
         return None
 
-    def __add_remove_attachment(self, request: HttpRequest) -> None:
+    def __prepare_new_images(self, request: HttpRequest, activity: models.Activity) -> list[ContentFile]:
+        """Download or decode images to be added to activity.
+
+        :param request: HttpRequest object
+        :param activity: Activity being edited
+        :return: List of image files.
+        """
+        attachment_to_add = request.data.get("new_images", [])
+        if not attachment_to_add:
+            return []
+        if any("base64" in attachment for attachment in attachment_to_add):
+            return image_decoder_64(attachment_to_add, activity.id)
+        return image_fetcher(attachment_to_add)
+
+    def __add_remove_attachment(self, request: HttpRequest, activity: models.Activity,
+                                new_images: list[ContentFile]) -> None:
         """Add or remove images from activity.
 
         :param request: HttpRequest object
+        :param activity: Activity being edited
+        :param new_images: Image files to be attached to activity.
         """
-        activity = self.get_object()
         attachment_ids_to_remove = request.data.get("remove_attachments", [])
-
         if attachment_ids_to_remove:
-            image_deleter(attachment_ids_to_remove)
+            image_deleter(activity.attachment_set.filter(pk__in=attachment_ids_to_remove))
 
-        attachment_to_add = request.data.get("new_images", [])
-        if attachment_to_add:
-            if any("base64" in attachment for attachment in attachment_to_add):
-                image_loader_64(attachment_to_add, activity)
-            else:
-                image_loader(attachment_to_add, activity)
+        attachment_saver(new_images, activity)
 
-    def __grant_host_remove_host(self, request: HttpRequest) -> response.Response | None:
+    def __grant_host_remove_host(self, request: HttpRequest, activity: models.Activity) -> response.Response | None:
         """Grant host and remove host from activity.
 
         :param request: HttpRequest object
+        :param activity: Activity being edited
         """
-        activity = self.get_object()
         grant_host_user_ids = request.data.get("grant_host", [])
         if grant_host_user_ids:
             res = edit_host_access(grant_host_user_ids, activity, request.user, remove=False)
@@ -180,20 +224,27 @@ class ActivityDetail(mixins.RetrieveModelMixin,
 
         return None
 
-    def __kick_attendee(self, request: HttpRequest) -> None:
+    def __kick_attendee(self, request: HttpRequest, activity: models.Activity) -> None:
         """Handle kick attendee from activity.
 
         :param request: HttpRequest object
+        :param activity: Activity being edited
         """
-        activity = self.get_object()
-
         attendee_ids_to_remove = request.data.get("attendee_to_remove", [])
+        if not attendee_ids_to_remove:
+            return
+
         attendee_to_remove = activity.attend_set.filter(user__id__in=attendee_ids_to_remove, is_host=False)
-        attendee_infos_to_remove = [a.user for a in attendee_to_remove]
+        attendee_infos_to_remove = [a.user for a in attendee_to_remove.select_related('user')]
 
-        print(attendee_ids_to_remove)
-        attendee_to_remove.delete()
+        activity.remove_attendees(attendee_to_remove)
 
         for attendee in attendee_infos_to_remove:
             req_data = RequestData(req_user=request.user, act_id=activity.id, target_user=attendee)
             logger.info(data_to_log(Action.KICK, req_data))
+
+    def __etag(self, request: HttpRequest, updated_at: datetime) -> str:
+        """Return quoted ETag of activity detail from its last update time and requested fields."""
+        params = sorted((key, sorted(values)) for key, values in request.GET.lists())
+        raw_tag = f'{updated_at.isoformat()}|{params}'
+        return str(quote_etag(hashlib.md5(raw_tag.encode(), usedforsecurity=False).hexdigest()))
@@ -0,0 +1,32 @@
+"""Module for handle URL /activities/export/<dataset>.<file_format>."""
+from typing import Any
+
+from activities.export import EXPORT_FORMATS, activity_rows, attendance_rows, export_lines
+from django.http import HttpRequest, StreamingHttpResponse
+from rest_framework import exceptions, generics, permissions
+
+
+class ActivityExport(generics.GenericAPIView):
+    """Stream every activity or attendance as NDJSON or CSV for staff."""
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> StreamingHttpResponse:
+        """Handle get request by stream the requested dataset, attendance can be filtered by activity id.
+
+        :param request: Http request object
+        :return: Streaming http response object
+        """
+        dataset, file_format = kwargs['dataset'], kwargs['file_format']
+
+        if dataset == 'attendance':
+            activity_id = request.GET.get('activity')
+            if activity_id is not None and not activity_id.isdigit():
+                raise exceptions.ParseError('activity must be an activity id.')
+            rows = attendance_rows(int(activity_id) if activity_id else None)
+        else:
+            rows = activity_rows()
+
+        res = StreamingHttpResponse(export_lines(rows, file_format), content_type=EXPORT_FORMATS[file_format])
+        res['Content-Disposition'] = f'attachment; filename="{dataset}.{file_format}"'
+        return res
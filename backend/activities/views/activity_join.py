@@ -4,6 +4,8 @@ from typing import Any
 from activities import models
 from activities.logger import Action, RequestData, data_to_log, logger
 from activities.serializer import model_serializers
+from activities.serializer.custom_validator import ForbiddenValidationError
+from django.db import IntegrityError
 from django.http import HttpRequest
 from rest_framework import generics, mixins, permissions, response, status
 
@@ -40,12 +42,22 @@ class JoinLeaveView(
             }
         )
         serializer.is_valid(raise_exception=True)
-        new_attend = serializer.save()
-        headers = self.get_success_headers(serializer.data)
 
-        act = new_attend.activity
+        act = serializer.validated_data['activity']
         req_data = RequestData(req_user=request.user, act_id=act.id)
 
+        # Validator only fail fast, seat reservation on save is what guarantee capacity under concurrent join.
+        try:
+            serializer.save()
+        except models.ActivityFull as e:
+            logger.warning(data_to_log(Action.FAIL_JOIN, req_data, 'Full'))
+            raise ForbiddenValidationError(str(e))
+        except IntegrityError:
+            logger.warning(data_to_log(Action.FAIL_JOIN, req_data, 'Already join'))
+            raise ForbiddenValidationError(f"You've already joined the activity {act.name}.")
+
+        headers = self.get_success_headers(serializer.data)
+
         logger.info(data_to_log(Action.JOIN, req_data))
         return response.Response(
             {'message': f'You have successfully joined the activity {act.name}'},
@@ -1,17 +1,29 @@
 """Module for handle URL /activities."""
+import operator
 import re
-from datetime import timedelta
+from datetime import date, datetime, time, timedelta
+from datetime import timezone as dt_timezone
+from functools import reduce
 from typing import Any
 
 from activities import models
+from activities.cache import (get_cached_index, index_cache_key,
+                              set_cached_index)
+from activities.facets import count_facets, parse_facets
+from activities.geo import filter_near
 from activities.logger import Action, RequestData, data_to_log, logger
+from activities.pagination import DateCursorPagination
+from activities.search import search_activities
 from activities.serializer import model_serializers
+from activities.snapshot import (snapshot_enabled, snapshot_is_fresh,
+                                 snapshot_queryset)
 from activities.views.util import (create_location, image_loader,
                                    image_loader_64)
 from django.db.models import DateTimeField, ExpressionWrapper, F, Q, QuerySet
 from django.http import HttpRequest
 from django.utils import dateparse, timezone
-from rest_framework import generics, mixins, permissions, response, status
+from rest_framework import (generics, mixins, pagination, permissions,
+                            response, status)
 
 
 class ActivityList(
@@ -24,49 +36,90 @@ class ActivityList(
     queryset = models.Activity.objects.filter(is_cancelled=False).order_by("date")
     serializer_class = model_serializers.ActivitiesSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    default_radius_km = 5.0
+    max_radius_km = 100.0
+    facet_counts: dict[str, dict[Any, int]] | None = None
+    # Query parameters that can be answered from snapshot of upcoming activities.
+    snapshot_params = {'page', 'cursor', 'fields', 'omit'}
+    # Days from start_date (or today) that day of week filter expands into date ranges.
+    week_day_horizon = timedelta(days=56)
+
+    @property
+    def paginator(self) -> pagination.BasePagination | None:
+        """Use cursor pagination when cursor query parameter is given, page number pagination otherwise.
+
+        Keyword search is always paginated by page number, since cursor only seeks by (date, id)
+        and would lose the search rank ordering.
+        """
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if DateCursorPagination.cursor_query_param in params and not params.get("keyword"):
+                self._paginator = DateCursorPagination()
+            else:
+                self._paginator = super().paginator
+        return self._paginator
 
     def get_queryset(self) -> QuerySet:
         """Activity index view returns a list of all the activities according to query parameters."""
-        queryset = super().get_queryset()
+        if self.__use_snapshot():
+            return snapshot_queryset()
 
-        offset = 0
-        if (self.request.headers.get('tzoffset')):
-            offset = int(self.request.headers.get('tzoffset'))
+        queryset = super().get_queryset()
 
-        usertz = timedelta(minutes=offset)
+        usertz = self.__user_tz()
 
         queryset = queryset.filter(end_registration_date__gte=timezone.now())
 
         keyword = self.request.GET.get("keyword")
         if keyword:
-            queryset = queryset.filter(Q(name__iregex=rf'{keyword}') | Q(detail__iregex=rf'{keyword}'))
+            queryset = search_activities(queryset, keyword)
+
+        near = self.__parse_near(self.request.GET.get("near"), self.request.GET.get("radius"))
+        if near:
+            queryset = filter_near(queryset, *near)
+
+        # Shift parameters instead of the date column, so index on date can be used.
+        start_date = dateparse.parse_datetime(self.request.query_params.get("start_date") or '')
+        if start_date:
+            start_date += usertz
+            queryset = queryset.filter(date__gte=start_date)
+
+        end_date = dateparse.parse_datetime(self.request.query_params.get("end_date") or '')
+        if end_date:
+            end_date = end_date.replace(hour=23, minute=59, second=59) + usertz
+            queryset = queryset.filter(date__lte=end_date)
 
-        queryset = queryset.annotate(
-            modified_date=ExpressionWrapper(
-                F('date') - usertz,
-                output_field=DateTimeField()
-            )
-        )
         day = self.__parse_date(self.request.GET.get("day"))
         if day:
-            queryset = queryset.filter(modified_date__week_day__in=day)
+            queryset = self.__filter_week_days(queryset, day, usertz, start_date, end_date)
 
-        if self.request.query_params.get("start_date"):
-            start_date = dateparse.parse_datetime(self.request.query_params.get("start_date"))
-            if start_date:
-                queryset = queryset.filter(modified_date__gte=start_date)
+        return self.get_serializer_class().setup_eager_loading(queryset, self.request.query_params)
 
-        if self.request.query_params.get("end_date"):
-            end_date = dateparse.parse_datetime(self.request.query_params.get("end_date"))
-            if end_date:
-                end_date = end_date.replace(hour=23, minute=59, second=59)
-                queryset = queryset.filter(modified_date__lte=end_date)
+    def get_serializer_class(self) -> Any:
+        """Serialize stored data when activities are read from snapshot."""
+        if self.__use_snapshot():
+            return model_serializers.ActivitySnapshotSerializer
+        return super().get_serializer_class()
 
-        return queryset
+    def paginate_queryset(self, queryset: QuerySet) -> Any:
+        """Count requested facets over the filtered queryset before it is paginated."""
+        facets = parse_facets(self.request.query_params.get("facets"))
+        if facets:
+            self.facet_counts = count_facets(queryset, facets, self.__user_tz())
+        return super().paginate_queryset(queryset)
 
     def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> response.Response:
-        """Handle get request by return with list of activity."""
-        return self.list(request, *args, **kwargs)
+        """Handle get request by return with cached list of activity, list and cache it if not cached yet."""
+        key = index_cache_key(request)
+        data = get_cached_index(key)
+        if data is not None:
+            return response.Response(data)
+
+        res = self.list(request, *args, **kwargs)
+        if self.facet_counts is not None:
+            res.data['facets'] = self.facet_counts
+        set_cached_index(key, res.data)
+        return res
 
     def post(self, request: HttpRequest, *args: Any, **kwargs: Any) -> response.Response:
         """Create an activity and add user who create it to attend table.
@@ -153,6 +206,76 @@ class ActivityList(
         coordinate = request.data.pop('location', {'lat': 0, 'lon': 0})
         return create_location(coordinate)
 
+    def __use_snapshot(self) -> bool:
+        """Return whether request list upcoming activities without any filter, which can be read from fresh snapshot."""
+        if not hasattr(self, '_use_snapshot'):
+            only_paging = set(self.request.query_params) <= self.snapshot_params
+            self._use_snapshot = bool(
+                self.request.method == 'GET' and snapshot_enabled() and only_paging and snapshot_is_fresh()
+            )
+        return self._use_snapshot
+
+    def __user_tz(self) -> timedelta:
+        """Return timezone offset of user from tzoffset header, local time = UTC time - offset."""
+        offset = 0
+        if (self.request.headers.get('tzoffset')):
+            offset = int(self.request.headers.get('tzoffset'))
+
+        return timedelta(minutes=offset)
+
+    def __filter_week_days(
+        self, queryset: QuerySet, days: list[int], usertz: timedelta,
+        start_date: datetime | None, end_date: datetime | None
+    ) -> QuerySet:
+        """Filter activities which take place on given days of week in user timezone.
+
+        Matching local days from start_date (today if not given) to end_date, at most week_day_horizon later,
+        are converted to date ranges so the index on date is used; consecutive days are merged into one range.
+        Activities outside of them, only reachable when start_date or end_date is not given,
+        are matched by day of week of their shifted date.
+
+        :param queryset: Activity queryset to be filtered.
+        :param days: Days of week, 1 = Sunday and 7 = Saturday.
+        :param usertz: Timezone offset of user, local time = UTC time - usertz.
+        :param start_date: Lower bound of date already applied to queryset, in UTC.
+        :param end_date: Upper bound of date already applied to queryset, in UTC.
+        :return: Filtered queryset.
+        """
+        first_day = ((start_date or timezone.now()) - usertz).date()
+        last_day = first_day + self.week_day_horizon
+        end_day = (end_date - usertz).date() if end_date else None
+        if end_day and end_day <= last_day:
+            last_day = end_day
+
+        ranges: list[list[date]] = []
+        local_day = first_day
+        while local_day <= last_day:
+            if local_day.isoweekday() % 7 + 1 in days:
+                if ranges and ranges[-1][1] == local_day:
+                    ranges[-1][1] = local_day + timedelta(days=1)
+                else:
+                    ranges.append([local_day, local_day + timedelta(days=1)])
+            local_day += timedelta(days=1)
+
+        def to_utc(day: date) -> datetime:
+            return datetime.combine(day, time.min, tzinfo=dt_timezone.utc) + usertz
+
+        condition = Q(pk__in=[])
+        for start, end in ranges:
+            condition |= Q(date__gte=to_utc(start), date__lt=to_utc(end))
+
+        outside = []
+        if not start_date:
+            outside.append(Q(date__lt=to_utc(first_day)))
+        if end_day is None or last_day < end_day:
+            outside.append(Q(date__gte=to_utc(last_day + timedelta(days=1))))
+        if outside:
+            queryset = queryset.alias(
+                local_date=ExpressionWrapper(F('date') - usertz, output_field=DateTimeField())
+            )
+            condition |= reduce(operator.or_, outside) & Q(local_date__week_day__in=days)
+        return queryset.filter(condition)
+
     def __parse_date(self, date_param: str) -> list[int] | None:
 
         day_list_format = r'^(?:[1-7](?:,[1-7])*)?$'
@@ -166,3 +289,19 @@ class ActivityList(
             return None
 
         return [int(s.strip()) for s in split_day]
+
+    def __parse_near(self, near_param: str | None, radius_param: str | None) -> tuple[float, float, float] | None:
+        """Parse near (lat,lon) and radius (km) query parameters, return None if they are invalid."""
+        if not near_param:
+            return None
+
+        try:
+            lat, lon = (float(value) for value in near_param.split(','))
+            radius = float(radius_param) if radius_param else self.default_radius_km
+        except ValueError:
+            return None
+
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180 and 0 < radius):
+            return None
+
+        return lat, lon, min(radius, self.max_radius_km)
@@ -0,0 +1,36 @@
+"""Module for handle URL /activities/suggest/."""
+from typing import Any
+
+from activities import models
+from activities.cache import get_cached_suggestions, set_cached_suggestions
+from activities.search import suggest_activities
+from django.http import HttpRequest
+from django.utils import timezone
+from rest_framework import generics, permissions, response
+
+
+class ActivitySuggest(generics.GenericAPIView):
+    """Return id and name of upcoming activities which name start with the typed prefix, for search box typeahead."""
+
+    queryset = models.Activity.objects.filter(is_cancelled=False)
+    permission_classes = [permissions.AllowAny]
+    suggest_limit = 10
+    max_prefix_length = 255
+
+    def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> response.Response:
+        """Handle get request by return suggestions for q query parameter.
+
+        :param request: Http request object
+        :return: Http response object
+        """
+        prefix = request.GET.get('q', '').strip()[:self.max_prefix_length]
+        if not prefix:
+            return response.Response([])
+
+        suggestions = get_cached_suggestions(prefix)
+        if suggestions is None:
+            queryset = self.get_queryset().filter(end_registration_date__gte=timezone.now())
+            suggestions = suggest_activities(queryset, prefix, self.suggest_limit)
+            set_cached_suggestions(prefix, suggestions)
+
+        return response.Response(suggestions)
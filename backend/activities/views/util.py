@@ -1,13 +1,18 @@
 """Utility module."""
 import base64
 import uuid
+from functools import partial
 from typing import Any
 
 import requests
 from activities import models
 from activities.logger import Action, RequestData, data_to_log, logger
+from activities.roles import get_role
+from activities.signals import attends_bulk_changed
 from django.contrib.auth import models as auth_models
 from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import QuerySet
 from django.http import HttpRequest
 from django.middleware.csrf import get_token
 from django.shortcuts import get_object_or_404
@@ -37,7 +42,7 @@ def check_user_status(request: HttpRequest, *args: Any, **kwargs: Any) -> respon
     activity = get_object_or_404(models.Activity, id=kwargs.get('id'))
 
     return response.Response(
-        activity.user_status(request.user)
+        get_role(request, activity).status()
     )
 
 
@@ -75,37 +80,39 @@ def edit_host_access(
         remove: bool = True) -> response.Response | None:
     """Save is_host value according to the given query into the Attend objects.
 
+    Every target is validated before anything is written, then all of them are updated at once.
+
     :param user_ids: List of user_ids
     :param act: Activity object to query Attend object
     :param request_user: User object to query Attend object
     :param remove: True if granting host access, False if removing host access
     """
-    if request_user != act.owner:
+    if request_user.id != act.owner_id:
         req_data = RequestData(req_user=request_user, act_id=act.id)
         logger.warning(data_to_log(Action.FAIL_EDIT_HOST, req_data, 'Not owner'))
         return response.Response({'message': "You must be the owner of this activity to perform this action."},
                                  status=403)
-    for user_id in user_ids:
-        user = get_object_or_404(auth_models.User, id=user_id)
 
-        if not act.is_participated(user) and not act.is_hosts(user):
+    attends = {attend.user_id: attend for attend in act.attend_set.filter(user_id__in=user_ids).select_related('user')}
+    for user_id in user_ids:
+        if user_id not in attends:
+            user = get_object_or_404(auth_models.User, id=user_id)
             return response.Response({'message': f'Cannot find user {user.username} in this activity.'}, status=403)
 
-        attend = get_object_or_404(models.Attend, activity=act, user=user)
-
-        if user == act.owner:
+        if user_id == act.owner_id:
             return response.Response({'message': 'Cannot modify access of your own activity.'}, status=403)
 
-        attend.is_host = not remove
-
-        if not remove:
-            attend.checked_in = True
-        elif not act.check_in_allowed:
-            attend.checked_in = False
-
-        attend.save()
-
-        req_data = RequestData(req_user=request_user, act_id=act.id, target_user=user)
+    if not remove:
+        changes = {'is_host': True, 'checked_in': True}
+    elif not act.check_in_allowed:
+        changes = {'is_host': False, 'checked_in': False}
+    else:
+        changes = {'is_host': False}
+    models.Attend.objects.filter(pk__in=[attend.id for attend in attends.values()]).update(**changes)
+    attends_bulk_changed([act.id])
+
+    for attend in attends.values():
+        req_data = RequestData(req_user=request_user, act_id=act.id, target_user=attend.user)
         logger.info(data_to_log(Action.EDIT_HOST, req_data, f'is_host={not remove}'))
 
     return None
@@ -117,6 +124,16 @@ def image_loader(image_urls: list[str], act: models.Activity) -> None:
     :param image_urls: List of string contains image urls.
     :param act: Activity object for creating Attachment.
     """
+    attachment_saver(image_fetcher(image_urls), act)
+
+
+def image_fetcher(image_urls: list[str]) -> list[ContentFile]:
+    """Download images, skipping the ones that fail.
+
+    :param image_urls: List of string contains image urls.
+    :return: List of downloaded image files.
+    """
+    images = []
     for url in image_urls[:10]:
         try:
             img_response = requests.get(url)
@@ -124,22 +141,20 @@ def image_loader(image_urls: list[str], act: models.Activity) -> None:
 
             # Extract the image name and create ContentFile for attachment
             file_name = url.split("/")[-1]
-            image_content = ContentFile(img_response.content, name=file_name)
-            models.Attachment.objects.create(activity=act, image=image_content)
+            images.append(ContentFile(img_response.content, name=file_name))
         except requests.exceptions.RequestException as e:  # pragma: no cover
             print(f"Failed to download image from {url}: {e}")
+    return images
 
 
-def image_deleter(image_ids: list[int]) -> None:
-    """Delete images and Attachment objects.
+def image_deleter(attachments: QuerySet) -> None:
+    """Delete Attachment objects, and their images once the deletion is committed.
 
-    :param image_ids: List of ids of Attachment object.
+    :param attachments: Attachment queryset to delete.
     """
-    for attachment_id in image_ids:
-        attachment = models.Attachment.objects.filter(pk=attachment_id).first()
-        if attachment:
-            attachment.image.delete(save=False)
-            attachment.delete()
+    for attachment in attachments:
+        transaction.on_commit(partial(attachment.image.storage.delete, attachment.image.name))
+    attachments.delete()
 
 
 def image_loader_64(image_data_list: list[str], act: models.Activity) -> None:
@@ -148,6 +163,17 @@ def image_loader_64(image_data_list: list[str], act: models.Activity) -> None:
     :param image_data_list: List of string contains image urls in base64 format.
     :param act: Activity object for creating Attachment.
     """
+    attachment_saver(image_decoder_64(image_data_list, act.id), act)
+
+
+def image_decoder_64(image_data_list: list[str], act_id: int) -> list[ContentFile]:
+    """Decode base64-encoded images, skipping the ones that fail.
+
+    :param image_data_list: List of string contains image urls in base64 format.
+    :param act_id: Id of activity, used to name the files.
+    :return: List of decoded image files.
+    """
+    images = []
     for image_data in image_data_list:
         try:
             # Separate the base64 header if it exists
@@ -158,14 +184,22 @@ def image_loader_64(image_data_list: list[str], act: models.Activity) -> None:
             image_content = base64.b64decode(image_data)
 
             # Generate a unique name for the file, for example by using the message ID
-            file_name = f"{act.id}_attachment_{uuid.uuid4()}.jpg"
-
-            # Create ContentFile and save the attachment
-            image_file = ContentFile(image_content, name=file_name)
-            models.Attachment.objects.create(activity=act, image=image_file)
+            file_name = f"{act_id}_attachment_{uuid.uuid4()}.jpg"
+            images.append(ContentFile(image_content, name=file_name))
 
         except Exception as e:  # pragma: no cover
             print(f"Failed to decode image data: {e}")
+    return images
+
+
+def attachment_saver(images: list[ContentFile], act: models.Activity) -> None:
+    """Save downloaded or decoded images into Attachment objects.
+
+    :param images: List of image files.
+    :param act: Activity object for creating Attachment.
+    """
+    for image in images:
+        models.Attachment.objects.create(activity=act, image=image)
 
 
 def create_location(coor: dict[str, float]) -> int | None:
@@ -180,7 +214,6 @@ def create_location(coor: dict[str, float]) -> int | None:
             latitude=latitude,
             longitude=longitude
         )
-        location.save()
 
         return int(location.id)
 
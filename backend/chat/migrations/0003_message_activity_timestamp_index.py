@@ -0,0 +1,17 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0002_attachment'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['activity', 'timestamp'], name='message_activity_time_idx'),
+        ),
+    ]
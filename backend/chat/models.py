@@ -16,6 +16,9 @@ class Message(models.Model):
         """Meta class for Message models."""
 
         ordering = ["timestamp"]
+        indexes = [
+            models.Index(fields=['activity', 'timestamp'], name='message_activity_time_idx'),
+        ]
 
 
 class Attachment(models.Model):
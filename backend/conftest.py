@@ -0,0 +1,12 @@
+"""Pytest configuration for backend tests."""
+from typing import Iterator
+
+import pytest
+from django.core.cache import cache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache() -> Iterator[None]:
+    """Start every test with empty cache, database is rolled back after each test but cache is not."""
+    cache.clear()
+    yield
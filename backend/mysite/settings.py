@@ -115,6 +115,30 @@ else:
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache', cast=str),
+        'LOCATION': config('CACHE_LOCATION', default='ku-tangtee', cast=str),
+    }
+}
+
+# Seconds that activity index response is cached, 0 to disable.
+ACTIVITY_INDEX_CACHE_TIMEOUT = config('ACTIVITY_INDEX_CACHE_TIMEOUT', default=300, cast=int)
+# Seconds that activity name suggestions for a prefix are cached, 0 to disable.
+ACTIVITY_SUGGEST_CACHE_TIMEOUT = config('ACTIVITY_SUGGEST_CACHE_TIMEOUT', default=60, cast=int)
+# Seconds between full rebuilds of upcoming activities snapshot by refresh_activity_snapshot --loop,
+# 0 disables the snapshot. Index is read from activity table when snapshot was not rebuilt within twice of it.
+ACTIVITY_SNAPSHOT_MAX_AGE = config('ACTIVITY_SNAPSHOT_MAX_AGE', default=300, cast=int)
+# Seconds that a signed QR check-in token stays valid.
+ACTIVITY_CHECKIN_TOKEN_MAX_AGE = config('ACTIVITY_CHECKIN_TOKEN_MAX_AGE', default=120, cast=int)
+# Seconds between reputation settlement runs of settle_reputation command.
+REPUTATION_SETTLEMENT_INTERVAL = config('REPUTATION_SETTLEMENT_INTERVAL', default=60, cast=int)
+# Seconds a settlement worker holds its lease, another worker takes over after it if the holder died.
+REPUTATION_SETTLEMENT_LEASE = config('REPUTATION_SETTLEMENT_LEASE', default=600, cast=int)
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -0,0 +1,96 @@
+"""Management command for benchmarking reputation settlement on a seeded dataset."""
+import time
+from typing import Any
+
+from activities.models import Activity, Attend
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from profiles.models import Profile
+
+SEED_CHUNK_SIZE = 5000
+
+
+class Command(BaseCommand):
+    """Seed ended activities with attendees, then time Profile.check_missed_check_ins on them."""
+
+    help = 'Seed ended activities and report time and number of queries of reputation settlement.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add dataset size options and --keep.
+
+        :param parser: Command argument parser.
+        """
+        parser.add_argument('--activities', type=int, default=100_000, help='Number of ended activities to seed.')
+        parser.add_argument('--attendees', type=int, default=3, help='Number of attendees of each activity.')
+        parser.add_argument('--users', type=int, default=200, help='Number of seeded users attendees are drawn from.')
+        parser.add_argument('--keep', action='store_true', help='Keep seeded data instead of rolling it back.')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Seed dataset, settle it twice and roll everything back unless --keep is given."""
+        if options['attendees'] >= options['users']:
+            self.stderr.write('--users must be more than --attendees.')
+            return
+
+        with transaction.atomic():
+            start = time.perf_counter()
+            self.seed(options['activities'], options['attendees'], options['users'])
+            self.stdout.write(f'Seeded {options["activities"]} activities in {time.perf_counter() - start:.2f}s.')
+
+            self.settle('First run')
+            # Everything is settled already, second run should only look for unsettled activities.
+            self.settle('Second run')
+
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+    def seed(self, activity_count: int, attendee_count: int, user_count: int) -> None:
+        """Create users with profile and ended activities, every few of them cancelled or without check-in.
+
+        :param activity_count: Number of activities.
+        :param attendee_count: Number of attendees of each activity.
+        :param user_count: Number of users.
+        """
+        prefix = f'settlement-bench-{int(time.time())}'
+        users = User.objects.bulk_create(User(username=f'{prefix}-{i}') for i in range(user_count))
+        Profile.objects.bulk_create(
+            Profile(user=user, ku_generation=80, faculty='Benchmark', reputation_score=50) for user in users
+        )
+
+        ended = timezone.now() - timezone.timedelta(days=1)
+        for chunk_start in range(0, activity_count, SEED_CHUNK_SIZE):
+            numbers = range(chunk_start, min(chunk_start + SEED_CHUNK_SIZE, activity_count))
+            activities = Activity.objects.bulk_create(
+                Activity(
+                    owner=users[0], name=f'{prefix}-{i}', detail='Settlement benchmark', date=ended, end_date=ended,
+                    end_registration_date=ended, is_cancelled=i % 50 == 0, people_count=attendee_count + 1
+                ) for i in numbers
+            )
+            attends = []
+            for i, activity in zip(numbers, activities):
+                attends.append(Attend(activity=activity, user=users[0], is_host=True, checked_in=True))
+                for j in range(attendee_count):
+                    user = users[1 + (i + j) % (user_count - 1)]
+                    # Every 10th activity has nobody checked-in, so its host is penalized.
+                    attends.append(Attend(activity=activity, user=user, checked_in=i % 10 != 0 and (i + j) % 3 == 0))
+            Attend.objects.bulk_create(attends)
+
+        if connection.vendor == 'postgresql':
+            # Autovacuum cannot see uncommitted rows, give the planner statistics of a live table.
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE activities_activity, activities_attend, profiles_profile')
+
+    def settle(self, label: str) -> None:
+        """Run settlement and report its time and number of queries.
+
+        :param label: Label of the run in the report.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            settled = Profile.check_missed_check_ins()
+            elapsed = time.perf_counter() - start
+        self.stdout.write(
+            self.style.SUCCESS(f'{label}: settled {settled} activities in {elapsed:.2f}s with {len(queries)} queries.')
+        )
@@ -0,0 +1,55 @@
+"""Management command for settling reputation of ended activities on a schedule."""
+import os
+import socket
+import time
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import close_old_connections
+from profiles.logger import logger
+from profiles.settlement import run_settlement
+
+
+class Command(BaseCommand):
+    """Run reputation settlement every few seconds, workers share one lease so only one of them settles at a time."""
+
+    help = 'Settle missed check-ins of ended activities every REPUTATION_SETTLEMENT_INTERVAL seconds, --once to run once.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add --once and --interval options.
+
+        :param parser: Command argument parser.
+        """
+        parser.add_argument('--once', action='store_true', help='Settle once and exit.')
+        parser.add_argument(
+            '--interval', type=int, default=settings.REPUTATION_SETTLEMENT_INTERVAL, help='Seconds between runs.'
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        """Settle, then keep settling every interval unless --once is given."""
+        holder = f'{socket.gethostname()}:{os.getpid()}'
+        while True:
+            self.tick(holder)
+            if options['once']:
+                return
+            time.sleep(options['interval'])
+            # Long running worker should not keep using a connection the database has dropped.
+            close_old_connections()
+
+    def tick(self, holder: str) -> None:
+        """Run settlement once, a failed run is logged and retried on the next tick.
+
+        :param holder: Identity of this worker.
+        """
+        try:
+            settled = run_settlement(holder)
+        except Exception:
+            logger.exception('Reputation settlement failed')
+            self.stderr.write('Reputation settlement failed.')
+            return
+
+        if settled is None:
+            self.stdout.write('Another worker is settling, skipped.')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Settled {settled} activities.'))
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.15 on 2026-10-18 14:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0007_joblease'),
+    ]
+
+    # JobLease moved to activities app, its table is renamed and kept with the leases in it.
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.AlterModelTable(name='joblease', table='activities_joblease'),
+            ],
+            state_operations=[
+                migrations.DeleteModel(name='JobLease'),
+            ],
+        ),
+    ]
@@ -1,13 +1,17 @@
 """Database Model for profile app."""
-from typing import Any
+from collections import Counter, defaultdict
+from typing import Any, Optional
 
 from activities.models import Activity, Attend
 from django.contrib.auth.models import User
 from django.core.validators import MaxValueValidator
-from django.db import models
-from django.db.models import Q
+from django.db import models, transaction
+from django.db.models import F, Q, QuerySet
+from django.db.models.functions import Greatest, Least
 from django.utils import timezone
 
+SETTLEMENT_BATCH_SIZE = 1000
+
 
 class Profile(models.Model):
     """Profile model to store user's profile."""
@@ -38,13 +42,22 @@ class Profile(models.Model):
 
         :return: Integer number indicate number of active activity that user currently join
         """
-        # Filter only activity that still active and user is not a host.
-        return int(self.user.attend_set.filter(
+        return int(self.active_attends(self.user_id).count())
+
+    @staticmethod
+    def active_attends(user_id: int) -> QuerySet:
+        """Return attends of the user that count toward join limit.
+
+        :param user_id: Id of the user
+        :return: Attend queryset of activities that still active and user is not a host.
+        """
+        return Attend.objects.filter(
+            user_id=user_id,
             activity__end_date__gte=timezone.now(),
             activity__is_cancelled=False,
             checked_in=False,
             is_host=False
-        ).count())
+        )
 
     @property
     def join_limit(self) -> Any:
@@ -52,8 +65,17 @@ class Profile(models.Model):
 
         :return: Maximum number of activity that user able to join.
         """
-        limit = self.BASE_ACTIVITY_LIMIT + (self.reputation_score // self.REP_SCORE_PER_1_LIMIT)
-        return min(self.MAX_ACTIVITY_LIMIT, limit)
+        return self.join_limit_for(self.reputation_score)
+
+    @classmethod
+    def join_limit_for(cls, reputation_score: int) -> int:
+        """Calculate join limit of given reputation score.
+
+        :param reputation_score: Reputation score of the user
+        :return: Maximum number of activity that user able to join.
+        """
+        limit = cls.BASE_ACTIVITY_LIMIT + (reputation_score // cls.REP_SCORE_PER_1_LIMIT)
+        return min(cls.MAX_ACTIVITY_LIMIT, limit)
 
     @property
     def able_to_join_more(self) -> bool:
@@ -83,32 +105,76 @@ class Profile(models.Model):
         self.save(update_fields=['reputation_score'])
 
     @classmethod
-    def check_missed_check_ins(cls) -> None:
-        """Check for check-in status for the ended activities.
+    def increase_reputation_of(cls, *user_ids: int) -> None:
+        """Increase reputation score of users after check-in with a single atomic update, capped at 100.
+
+        :param user_ids: Ids of the users who checked-in.
+        """
+        cls.objects.filter(user_id__in=user_ids).update(
+            reputation_score=Least(F('reputation_score') + cls.CHECK_IN_REPUTATION_INCREASE, 100)
+        )
+
+    @staticmethod
+    def missed_check_in_attends(activities: dict[int, bool]) -> list[tuple[int, int]]:
+        """Return attends to be deducted for missing check-in, not deducted yet.
+
+        Attendees who did not check-in to an ended activity, hosts of the ended activity that no attendee checked-in
+        and hosts of the cancelled activity.
+
+        :param activities: Whether activity is cancelled, by id of ended or cancelled activity.
+        :return: Id and user id of the attends.
+        """
+        attends = list(Attend.objects.filter(activity_id__in=activities).values_list(
+            'id', 'user_id', 'activity_id', 'is_host', 'checked_in', 'rep_decrease'
+        ))
+        has_attendee = {act_id for _, _, act_id, is_host, _, _ in attends if not is_host}
+        has_check_in = {act_id for _, _, act_id, is_host, checked_in, _ in attends if not is_host and checked_in}
+
+        missed = []
+        for attend_id, user_id, act_id, is_host, checked_in, rep_decrease in attends:
+            if rep_decrease:
+                continue
+            if is_host:
+                penalized = activities[act_id] or (act_id in has_attendee and act_id not in has_check_in)
+            else:
+                penalized = not activities[act_id] and not checked_in
+            if penalized:
+                missed.append((attend_id, user_id))
+        return missed
+
+    @classmethod
+    def check_missed_check_ins(cls, batch_size: int = SETTLEMENT_BATCH_SIZE) -> int:
+        """Settle the ended and cancelled activities that are not settled yet.
+
+        Decrease reputation of users who missed check-ins, and of hosts when no attendee checked-in
+        or the activity is cancelled. Each activity is settled once, with a few set-based UPDATEs per batch
+        whatever number of activities and attendees it has.
 
-        Check for users who missed check-ins and decrease their reputation.
-        Check if there is at least an attendee who check-in, if not, decrease hosts reputation.
-        Also decrease hosts reputation when the activity is cancelled.
+        :param batch_size: Number of activities settled in one transaction.
+        :return: Number of settled activities.
         """
-        now = timezone.now()
-        activities = Activity.objects.filter(Q(end_date__lt=now) | Q(is_cancelled=True))
-
-        for activity in activities:
-            attendees = activity.attend_set.filter(is_host=False)
-            hosts = activity.attend_set.filter(is_host=True)
-
-            # deduct attendee point when not check-in
-            if not activity.is_cancelled:
-                for attendee in attendees:
-                    profile = cls.objects.get(user=attendee.user)
-                    if not attendee.checked_in and not attendee.rep_decrease:
-                        profile.decrease_reputation(attendee)
-
-            # deduct host point when no attendee check-in or the activity is cancelled
-            if (attendees.filter(checked_in=True).count() <= 0 < attendees.count()) or activity.is_cancelled:
-                for host in hosts:
-                    profile = cls.objects.get(user=host.user)
-                    profile.decrease_reputation(host)
+        settled = 0
+        while True:
+            with transaction.atomic():
+                due = Activity.objects.filter(
+                    Q(end_date__lt=timezone.now()) | Q(is_cancelled=True), settled=False
+                ).order_by('id').select_for_update(skip_locked=True)
+                batch = dict(due.values_list('id', 'is_cancelled')[:batch_size])
+                if not batch:
+                    return settled
+
+                missed = cls.missed_check_in_attends(batch)
+                # One user may miss several activities of the batch, users missing the same number share one UPDATE.
+                users_by_count: dict[int, list[int]] = defaultdict(list)
+                for user_id, count in Counter(user_id for _, user_id in missed).items():
+                    users_by_count[count].append(user_id)
+                for count, user_ids in users_by_count.items():
+                    cls.objects.filter(user_id__in=user_ids).update(
+                        reputation_score=Greatest(F('reputation_score') - count * cls.CHECK_IN_REPUTATION_DECREASE, 0)
+                    )
+                Attend.objects.filter(id__in=[attend_id for attend_id, _ in missed]).update(rep_decrease=True)
+                Activity.objects.filter(id__in=batch).update(settled=True)
+            settled += len(batch)
 
     @classmethod
     def has_profile(cls, user: User) -> Any:
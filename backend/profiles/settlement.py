@@ -0,0 +1,43 @@
+"""Periodic reputation settlement, run by one worker at a time."""
+from typing import Any, Optional
+
+from activities.models import JobLease
+from django.conf import settings
+from django.utils import timezone
+
+from . import models
+
+SETTLEMENT_JOB = 'reputation-settlement'
+
+
+def run_settlement(holder: str) -> Optional[int]:
+    """Settle ended and cancelled activities unless another worker is settling.
+
+    :param holder: Identity of the worker.
+    :return: Number of settled activities, None if another worker holds the lease.
+    """
+    if not JobLease.acquire(SETTLEMENT_JOB, holder, settings.REPUTATION_SETTLEMENT_LEASE):
+        return None
+
+    settled = None
+    try:
+        settled = models.Profile.check_missed_check_ins()
+    finally:
+        JobLease.release(SETTLEMENT_JOB, holder, settled)
+    return settled
+
+
+def settlement_status() -> dict[str, Any]:
+    """Return state of the settlement job from its lease, without settling anything.
+
+    :return: Whether settlement is running, when it last finished and how many activities it settled.
+    """
+    lease = JobLease.objects.filter(name=SETTLEMENT_JOB).values(
+        'locked_until', 'last_finished_at', 'last_result'
+    ).first() or {}
+    locked_until = lease.get('locked_until')
+    return {
+        'running': bool(locked_until and locked_until > timezone.now()),
+        'last_settled_at': lease.get('last_finished_at'),
+        'last_settled': lease.get('last_result'),
+    }
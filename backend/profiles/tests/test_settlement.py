@@ -0,0 +1,199 @@
+"""Test module for reputation settlement of ended and cancelled activities."""
+from io import StringIO
+from unittest import mock
+
+import django.test
+from activities.models import Activity, Attend, JobLease
+from activities.serializer.model_serializers import ActivitiesSerializer
+from activities.tests.shortcuts import client_join_activity, create_activity, create_test_user
+from django import urls
+from django.core.management import call_command
+from django.utils import timezone
+from profiles.models import Profile
+from profiles.settlement import SETTLEMENT_JOB, run_settlement
+
+
+class SettlementTest(django.test.TestCase):
+    """Test Profile.check_missed_check_ins."""
+
+    def setUp(self):
+        """Create two activities joined by two attendees, then end them."""
+        self.host = create_test_user('Host', rep_score=10)
+        self.attendee = create_test_user('Attendee', rep_score=10)
+        self.other = create_test_user('Other', rep_score=10)
+        _, self.activity = create_activity(host=self.host, client=self.client, data={'name': 'one', 'detail': 'a'})
+        _, self.other_activity = create_activity(host=self.host, client=self.client, data={'name': 'two', 'detail': 'b'})
+        for activity in (self.activity, self.other_activity):
+            for user in (self.attendee, self.other):
+                client_join_activity(client=self.client, user=user, activity=activity)
+        Attend.objects.filter(activity=self.activity, user=self.other).update(checked_in=True)
+
+        ended = timezone.now() - timezone.timedelta(days=1)
+        Activity.objects.update(date=ended, end_date=ended)
+
+    def reputation(self, user):
+        """Return current reputation score of the user."""
+        return Profile.objects.get(user=user).reputation_score
+
+    def test_settle_once(self):
+        """Missed check-ins should be deducted once per activity, even when settled again."""
+        self.assertEqual(Profile.check_missed_check_ins(), 2)
+        self.assertEqual(self.reputation(self.attendee), 8)
+        self.assertEqual(self.reputation(self.other), 9)
+        # only the activity nobody checked-in penalize its host
+        self.assertEqual(self.reputation(self.host), 9)
+        self.assertFalse(Activity.objects.filter(settled=False).exists())
+
+        self.assertEqual(Profile.check_missed_check_ins(), 0)
+        self.assertEqual(self.reputation(self.attendee), 8)
+        self.assertEqual(self.reputation(self.host), 9)
+
+    def test_not_ended_activity_is_not_settled(self):
+        """Activity that has not ended should wait for its end."""
+        Activity.objects.filter(pk=self.other_activity.pk).update(end_date=timezone.now() + timezone.timedelta(days=1))
+        self.assertEqual(Profile.check_missed_check_ins(), 1)
+        self.assertEqual(self.reputation(self.attendee), 9)
+        self.assertFalse(Activity.objects.get(pk=self.other_activity.pk).settled)
+
+    def test_query_count(self):
+        """Batch should be settled with the same few queries whatever number of activities and attendees."""
+        # savepoint, pick batch, read attends, reputation of users missing twice and once, mark attends,
+        # mark activities, release, then empty batch
+        with self.assertNumQueries(11):
+            Profile.check_missed_check_ins()
+
+    def test_reputation_never_below_zero(self):
+        """Reputation should stop at zero."""
+        Profile.objects.filter(user=self.attendee).update(reputation_score=1)
+        Profile.check_missed_check_ins()
+        self.assertEqual(self.reputation(self.attendee), 0)
+
+    def test_cancelled_after_settled(self):
+        """Cancelling a settled activity should penalize its host once more settlement run."""
+        Profile.check_missed_check_ins()
+        activity = Activity.objects.get(pk=self.activity.pk)
+        serializer = ActivitiesSerializer(activity, data={'is_cancelled': True}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        self.assertEqual(Profile.check_missed_check_ins(), 1)
+        self.assertEqual(self.reputation(self.host), 8)
+        self.assertEqual(self.reputation(self.attendee), 8)
+
+    def edit(self, activity, data):
+        """Edit the activity through its serializer, as the activity detail view does."""
+        serializer = ActivitiesSerializer(Activity.objects.get(pk=activity.pk), data=data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+    def test_extended_after_settled(self):
+        """Settled activity extended into the future should be settled again once it ends."""
+        Profile.check_missed_check_ins()
+        self.edit(self.activity, {'end_date': timezone.now() + timezone.timedelta(days=1)})
+        self.assertFalse(Activity.objects.get(pk=self.activity.pk).settled)
+        latecomer = create_test_user('Latecomer', rep_score=10)
+        Attend.objects.create(activity=Activity.objects.get(pk=self.activity.pk), user=latecomer)
+
+        self.assertEqual(Profile.check_missed_check_ins(), 0)
+        Activity.objects.filter(pk=self.activity.pk).update(end_date=timezone.now() - timezone.timedelta(hours=1))
+        self.assertEqual(Profile.check_missed_check_ins(), 1)
+        self.assertEqual(self.reputation(latecomer), 9)
+        # attendee who already lost reputation for this activity is not deducted again
+        self.assertEqual(self.reputation(self.attendee), 8)
+
+    def test_uncancelled_after_settled(self):
+        """Settled cancelled activity should be settled again when it is un-cancelled."""
+        Activity.objects.filter(pk=self.activity.pk).update(is_cancelled=True)
+        Profile.check_missed_check_ins()
+        self.edit(self.activity, {'is_cancelled': False})
+        self.assertFalse(Activity.objects.get(pk=self.activity.pk).settled)
+
+        self.assertEqual(Profile.check_missed_check_ins(), 1)
+        self.assertEqual(self.reputation(self.attendee), 8)
+
+    def test_other_edit_keep_settled(self):
+        """Editing other fields of a settled activity should not settle it again."""
+        Profile.check_missed_check_ins()
+        self.edit(self.activity, {'name': 'renamed'})
+        self.assertTrue(Activity.objects.get(pk=self.activity.pk).settled)
+
+    def test_benchmark_command(self):
+        """Benchmark should settle the seeded activities and roll them back."""
+        Profile.check_missed_check_ins()
+        out = StringIO()
+        call_command('benchmark_settlement', '--activities', '30', '--attendees', '2', '--users', '5', stdout=out)
+        self.assertIn('First run: settled 30 activities', out.getvalue())
+        self.assertIn('Second run: settled 0 activities', out.getvalue())
+        self.assertEqual(Activity.objects.count(), 2)
+
+
+class SettlementSchedulerTest(django.test.TestCase):
+    """Test settle_reputation command, its lease and check-missing status endpoint."""
+
+    def setUp(self):
+        """Create an ended activity that nobody checked-in."""
+        self.host = create_test_user('Host', rep_score=10)
+        self.attendee = create_test_user('Attendee', rep_score=10)
+        _, self.activity = create_activity(host=self.host, client=self.client, data={'name': 'one', 'detail': 'a'})
+        client_join_activity(client=self.client, user=self.attendee, activity=self.activity)
+        ended = timezone.now() - timezone.timedelta(days=1)
+        Activity.objects.update(date=ended, end_date=ended)
+
+    def test_only_one_holder(self):
+        """Lease should be held by one worker until it is released or expired."""
+        self.assertTrue(JobLease.acquire('job', 'worker-1', 60))
+        self.assertFalse(JobLease.acquire('job', 'worker-2', 60))
+
+        JobLease.release('job', 'worker-2')
+        self.assertFalse(JobLease.acquire('job', 'worker-2', 60))
+
+        JobLease.release('job', 'worker-1', 3)
+        self.assertTrue(JobLease.acquire('job', 'worker-2', 60))
+        self.assertEqual(JobLease.objects.get(name='job').last_result, 3)
+
+    def test_expired_lease_is_taken_over(self):
+        """Lease of a dead worker should be taken over after it expires."""
+        self.assertTrue(JobLease.acquire('job', 'worker-1', 60))
+        JobLease.objects.filter(name='job').update(locked_until=timezone.now() - timezone.timedelta(seconds=1))
+        self.assertTrue(JobLease.acquire('job', 'worker-2', 60))
+
+    def test_settlement_skipped_while_other_worker_settles(self):
+        """Settlement should not run while another worker holds the lease."""
+        JobLease.acquire(SETTLEMENT_JOB, 'other', 60)
+        self.assertIsNone(run_settlement('me'))
+        self.assertFalse(Activity.objects.get(pk=self.activity.pk).settled)
+
+    def test_failed_settlement_release_lease(self):
+        """Failed settlement should give the lease back without recording a run."""
+        with mock.patch.object(Profile, 'check_missed_check_ins', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                run_settlement('me')
+        lease = JobLease.objects.get(name=SETTLEMENT_JOB)
+        self.assertIsNone(lease.locked_until)
+        self.assertIsNone(lease.last_finished_at)
+
+    def test_command_once(self):
+        """Command should settle ended activities and record the run."""
+        out = StringIO()
+        call_command('settle_reputation', '--once', stdout=out)
+        self.assertIn('Settled 1 activities.', out.getvalue())
+        self.assertEqual(Profile.objects.get(user=self.attendee).reputation_score, 9)
+
+        lease = JobLease.objects.get(name=SETTLEMENT_JOB)
+        self.assertIsNone(lease.locked_until)
+        self.assertEqual(lease.last_result, 1)
+
+    def test_status_endpoint_does_not_settle(self):
+        """Check-missing endpoint should only read settlement status."""
+        self.client.force_login(self.attendee)
+        url = urls.reverse('profiles:check_missing')
+        # session, user, lease
+        with self.assertNumQueries(3):
+            res = self.client.get(url)
+        self.assertEqual(res.json()['last_settled'], None)
+        self.assertFalse(Activity.objects.get(pk=self.activity.pk).settled)
+
+        run_settlement('me')
+        res = self.client.get(url)
+        self.assertEqual(res.json()['last_settled'], 1)
+        self.assertFalse(res.json()['running'])
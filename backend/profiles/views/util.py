@@ -1,16 +1,15 @@
 """Utility module for profile model."""
 from django.http import HttpRequest
-from profiles import models
+from profiles.settlement import settlement_status
 from rest_framework import decorators
 from rest_framework.response import Response
 
 
 @decorators.api_view(['get'])
 def check_missing_attendance(request: HttpRequest) -> Response:
-    """Deduct reputation in case attendee does not attend and activity ended or cancelled.
+    """Return status of reputation settlement, which is run periodically by settle_reputation command.
 
     :param request: Http request object
-    :return: Message response
+    :return: Message response with settlement status
     """
-    models.Profile.check_missed_check_ins()
-    return Response({"message": "Attendance check and deductions completed."})
+    return Response({"message": "Attendance check and deductions run periodically.", **settlement_status()})